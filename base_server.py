@@ -151,10 +151,9 @@ async def chat_stream(request: ChatRequest):
     
     async def generate():
         try:
-            for chunk in chatbot.chat(
+            async for chunk in chatbot.astream(
                 user_message=request.message,
                 context=context,
-                stream=True,
                 save_history=False
             ):
                 yield f"data: {chunk}\n\n"
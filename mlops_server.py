@@ -552,10 +552,9 @@ async def chat_stream(request: ChatRequest):
         nonlocal accumulated_response
         
         try:
-            for chunk in chatbot.chat(
+            async for chunk in chatbot.astream(
                 user_message=request.message,
                 context=context,
-                stream=True,
                 save_history=False
             ):
                 accumulated_response += chunk
@@ -212,7 +212,7 @@ async def chat_stream(request: ChatRequest):
         nonlocal accumulated_response
         
         try:
-            for chunk in chatbot.chat(user_message=request.message, context=context, stream=True, save_history=False):
+            async for chunk in chatbot.astream(user_message=request.message, context=context, save_history=False):
                 accumulated_response += chunk
                 yield f"data: {chunk}\n\n"
             yield "data: [DONE]\n\n"
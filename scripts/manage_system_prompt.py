@@ -158,12 +158,7 @@ def restore_prompt_from_version(args):
     """Restore system prompt from a specific version."""
     vm = VersionManager()
     
-    # Find version
-    version = None
-    for v in vm.versions:
-        if v.version_id == args.version_id:
-            version = v
-            break
+    version = vm.get_version(args.version_id)
     
     if not version:
         print(f"Error: Version '{args.version_id}' not found.")
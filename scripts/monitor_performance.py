@@ -8,8 +8,8 @@ from typing import Dict, List
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from twinself import DigitalTwinChatbot
-from qdrant_client import QdrantClient
 from twinself.core.config import config
+from twinself.core.qdrant_utils import get_qdrant_client
 
 
 class PerformanceMonitor:
@@ -106,7 +106,7 @@ class PerformanceMonitor:
     
     def check_collection_health(self) -> Dict:
         """Check health of Qdrant collections."""
-        client = QdrantClient(path=config.qdrant_local_path, prefer_grpc=False)
+        client = get_qdrant_client()
         
         health = {}
         for collection in [
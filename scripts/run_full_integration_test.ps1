@@ -87,6 +87,7 @@ Write-Host "✓ MLOps server is ready`n" -ForegroundColor Green
 
 # Step 4: Run integration tests
 Write-Host "[4/5] Running integration tests..." -ForegroundColor Yellow
+$env:TWINSELF_INTEGRATION = "1"
 pytest tests/test_integration.py -v -m integration
 
 $testResult = $LASTEXITCODE
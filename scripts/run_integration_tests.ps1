@@ -31,6 +31,7 @@ try {
 
 # Run integration tests
 Write-Host "`nRunning integration tests..." -ForegroundColor Cyan
+$env:TWINSELF_INTEGRATION = "1"
 pytest tests/test_integration.py -v -m integration
 
 Write-Host "`n========================================" -ForegroundColor Cyan
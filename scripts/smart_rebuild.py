@@ -1,6 +1,7 @@
 import sys
 import argparse
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -8,16 +9,19 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from twinself.core.config import config
 from twinself.core.incremental_builder import IncrementalBuilder
 from twinself.core.version_manager import VersionManager
+from twinself.core.qdrant_utils import get_qdrant_client
 from twinself import build_semantic_memory, build_episodic_memory, build_procedural_memory
 from twinself.utils.generate_rules_from_episodic_data import (
     load_episodic_examples,
     generate_procedural_rules,
     save_generated_rules
 )
-from qdrant_client import QdrantClient
 
+if TYPE_CHECKING:
+    from qdrant_client import QdrantClient
 
-def get_collection_stats(client: QdrantClient) -> dict:
+
+def get_collection_stats(client: "QdrantClient") -> dict:
     """Get statistics for all collections."""
     stats = {}
     for collection in [
@@ -162,7 +166,7 @@ def main():
 
     if args.create_version:
         print("\nCreating version snapshot...")
-        client = QdrantClient(path=config.qdrant_local_path, prefer_grpc=False)
+        client = get_qdrant_client()
         stats = get_collection_stats(client)
         
         data_hash = {
@@ -195,10 +199,7 @@ def main():
         )
         
         # Update version with system prompt file
-        for v in version_manager.versions:
-            if v.version_id == version_id:
-                v.system_prompt_file = system_prompt_file
-                break
+        version_manager.get_version(version_id).system_prompt_file = system_prompt_file
         version_manager._save_registry()
         
         print(f"Version created: {version_id}")
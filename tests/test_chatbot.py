@@ -13,8 +13,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 def mock_all():
     """Mock all heavy dependencies"""
     with patch('twinself.chatbot.ChatGoogleGenerativeAI') as mock_llm, \
-         patch('twinself.chatbot.QdrantClient') as mock_client, \
-         patch('twinself.chatbot.Qdrant') as mock_store, \
+         patch('twinself.chatbot.get_qdrant_client') as mock_client, \
          patch('twinself.chatbot.EmbeddingService') as mock_embedding:
         
         # Mock LLM
@@ -27,20 +26,19 @@ def mock_all():
         
         # Mock Qdrant
         client = Mock()
+        client.scroll.return_value = ([], None)
+        client.query_points.return_value = Mock(points=[
+            Mock(payload={"page_content": "Test context", "metadata": {}})
+        ])
         mock_client.return_value = client
         
-        store = Mock()
-        store.similarity_search.return_value = [
-            Mock(page_content="Test context", metadata={})
-        ]
-        mock_store.return_value = store
-        
         # Mock embedding service
         service = Mock()
         service._embeddings = Mock()
+        service.embed_query.return_value = [0.1, 0.2, 0.3]
         mock_embedding.return_value = service
         
-        yield
+        yield llm
 
 
 def test_chatbot_initialization(mock_all):
@@ -72,3 +70,87 @@ def test_chatbot_with_context(mock_all):
     response = chatbot.chat("Tell me more", context=context, stream=False)
     
     assert response is not None
+
+
+def test_chatbot_repeated_question_served_from_cache(mock_all):
+    """Test identical question in the same conversation state skips the LLM"""
+    from twinself import DigitalTwinChatbot
+    
+    chatbot = DigitalTwinChatbot()
+    first = chatbot.chat("What are your skills?", stream=False, save_history=False)
+    calls_after_first = mock_all.invoke.call_count
+    second = chatbot.chat("What are your skills?", stream=False, save_history=False)
+    
+    assert second == first
+    assert mock_all.invoke.call_count == calls_after_first
+
+
+def test_chatbot_astream_yields_llm_chunks(mock_all):
+    """Test async streaming yields LLM chunks and records the turn"""
+    import asyncio
+    from twinself import DigitalTwinChatbot
+
+    async def fake_astream(messages):
+        for piece in ["Async ", "reply"]:
+            yield Mock(content=piece)
+
+    mock_all.astream = fake_astream
+
+    async def collect(chatbot):
+        return [chunk async for chunk in chatbot.astream("Stream something new")]
+
+    chatbot = DigitalTwinChatbot()
+    chunks = asyncio.run(collect(chatbot))
+
+    assert "".join(chunks) == "Async reply"
+    assert list(chatbot.chat_history)[-1] == {"role": "assistant", "content": "Async reply"}
+
+
+def test_chatbot_short_followup_reuses_retrieval(mock_all):
+    """Test a short follow-up in the same conversation skips the vector searches"""
+    from twinself import DigitalTwinChatbot
+
+    chatbot = DigitalTwinChatbot()
+    chatbot.chat("Tell me about your recent projects", stream=False)
+    searches_after_first = chatbot.qdrant_client.query_points.call_count
+    chatbot.chat("go on", stream=False)
+
+    assert chatbot.qdrant_client.query_points.call_count == searches_after_first
+
+
+def test_chatbot_retrieval_reuse_is_bounded(mock_all):
+    """Test near-repeat queries search again after the reuse limit and after memories reload"""
+    from twinself import DigitalTwinChatbot
+    from twinself.core.config import config
+
+    chatbot = DigitalTwinChatbot()
+    query = [1.0, 0.0, 0.0]
+    with patch.object(chatbot, '_retrieve_memories', return_value=([], [])) as retrieve:
+        for _ in range(config.retrieval_reuse_max_turns + 1):
+            chatbot._retrieve_or_reuse("What projects have you built?", query)
+        assert retrieve.call_count == 1
+
+        chatbot._retrieve_or_reuse("What projects have you built?", query)
+        assert retrieve.call_count == 2
+
+        chatbot._load_procedural_rules()
+        chatbot._retrieve_or_reuse("What projects have you built?", query)
+        assert retrieve.call_count == 3
+
+
+def test_chatbot_skips_rules_without_content(mock_all):
+    """Test a procedural point lacking page_content does not drop the other rules"""
+    from twinself import DigitalTwinChatbot
+
+    chatbot = DigitalTwinChatbot()
+    chatbot.qdrant_client.scroll.return_value = ([
+        Mock(payload={"page_content": "Be concise"}),
+        Mock(payload={}),
+        Mock(payload=None),
+    ], None)
+    try:
+        chatbot._load_procedural_rules()
+    finally:
+        chatbot.qdrant_client.scroll.return_value = ([], None)
+
+    assert chatbot.procedural_rules == ["Be concise"]
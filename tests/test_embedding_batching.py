@@ -0,0 +1,47 @@
+"""
+Tests for token-budget batching of document embeddings
+"""
+import numpy as np
+from pathlib import Path
+from unittest.mock import Mock
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from twinself.services.embedding_service import TokenBudgetEmbeddings, pack_by_token_budget
+
+
+def make_embeddings():
+    """HuggingFaceEmbeddings stand-in whose model treats each word as one token"""
+    model = Mock()
+    model.max_seq_length = 8
+    model.tokenizer.side_effect = lambda texts: {"input_ids": [t.split() for t in texts]}
+    model.encode.side_effect = lambda texts, **kwargs: np.array([[float(len(t.split()))] for t in texts])
+    embeddings = Mock(_client=model, encode_kwargs={"batch_size": 64, "normalize_embeddings": True})
+    return embeddings, model
+
+
+def test_batches_respect_padded_token_budget():
+    """Test every batch fits the budget and similar lengths are grouped"""
+    lengths = [1, 9, 2, 8, 1, 3]
+
+    batches = pack_by_token_budget(lengths, token_budget=10)
+
+    assert sorted(i for batch in batches for i in batch) == list(range(len(lengths)))
+    for batch in batches[1:]:
+        assert len(batch) * max(lengths[i] for i in batch) <= 10
+    assert batches[0] == [1]
+
+
+def test_vectors_returned_in_input_order():
+    """Test packed results are mapped back to the original positions"""
+    embeddings, model = make_embeddings()
+    batched = TokenBudgetEmbeddings(embeddings, token_budget=4)
+    texts = ["a", "a b c d", "a b", "a b c d e f g h i j"]
+
+    vectors = batched.embed_documents(texts)
+
+    assert vectors == [[1.0], [4.0], [2.0], [10.0]]
+    for call in model.encode.call_args_list:
+        assert call.kwargs["batch_size"] == len(call.args[0])
+        assert call.kwargs["normalize_embeddings"] is True
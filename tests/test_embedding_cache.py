@@ -0,0 +1,70 @@
+"""
+Tests for the persistent embedding cache
+"""
+import pytest
+import tempfile
+import shutil
+from pathlib import Path
+from unittest.mock import Mock
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from twinself.services.embedding_cache import EmbeddingCache, CachedEmbeddings
+
+
+@pytest.fixture
+def open_cache():
+    """Open caches in a temporary directory, closing them before cleanup"""
+    temp_dir = tempfile.mkdtemp()
+    caches = []
+
+    def _open():
+        cache = EmbeddingCache("test/model", temp_dir)
+        caches.append(cache)
+        return cache
+
+    yield _open
+    for cache in caches:
+        cache.close()
+    shutil.rmtree(temp_dir)
+
+
+@pytest.fixture
+def base_embeddings():
+    """Fake embedding model returning one float per character"""
+    embeddings = Mock()
+    embeddings.embed_documents.side_effect = lambda texts: [[float(len(t)), 0.5] for t in texts]
+    return embeddings
+
+
+def test_only_uncached_texts_are_embedded(open_cache, base_embeddings):
+    """Test second pass only embeds the new text"""
+    cached = CachedEmbeddings(base_embeddings, open_cache())
+
+    first = cached.embed_documents(["alpha", "beta"])
+    second = cached.embed_documents(["beta", "gamma", "alpha"])
+
+    assert second == [first[1], [5.0, 0.5], first[0]]
+    assert base_embeddings.embed_documents.call_args_list[-1].args == (["gamma"],)
+
+
+def test_duplicate_texts_embedded_once(open_cache, base_embeddings):
+    """Test duplicates within a batch are embedded a single time"""
+    cached = CachedEmbeddings(base_embeddings, open_cache())
+
+    vectors = cached.embed_documents(["same", "same"])
+
+    assert vectors[0] == vectors[1]
+    base_embeddings.embed_documents.assert_called_once_with(["same"])
+
+
+def test_cache_persists_across_instances(open_cache, base_embeddings):
+    """Test vectors survive reopening the cache file"""
+    CachedEmbeddings(base_embeddings, open_cache()).embed_documents(["persist"])
+    base_embeddings.embed_documents.reset_mock()
+
+    reopened = CachedEmbeddings(base_embeddings, open_cache())
+
+    assert reopened.embed_documents(["persist"]) == [[7.0, 0.5]]
+    base_embeddings.embed_documents.assert_not_called()
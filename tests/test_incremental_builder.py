@@ -0,0 +1,185 @@
+"""
+Tests for incremental change detection
+"""
+import pytest
+import tempfile
+import shutil
+from pathlib import Path
+from unittest.mock import patch
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from twinself.core.incremental_builder import IncrementalBuilder
+
+
+@pytest.fixture
+def workspace():
+    """Temporary data directory and builder with a cache file inside it"""
+    temp_dir = Path(tempfile.mkdtemp())
+    data_dir = temp_dir / "data"
+    data_dir.mkdir()
+    with patch('twinself.core.incremental_builder.EmbeddingService'):
+        builder = IncrementalBuilder(cache_path=str(temp_dir / "build_cache.json"))
+    yield builder, data_dir
+    shutil.rmtree(temp_dir)
+
+
+def test_detects_added_modified_deleted(workspace):
+    """Test changes are classified against the saved cache"""
+    builder, data_dir = workspace
+    (data_dir / "keep.md").write_text("same")
+    (data_dir / "edit.md").write_text("before")
+    (data_dir / "remove.md").write_text("gone soon")
+    (data_dir / "ignored.bin").write_text("not tracked")
+    builder.update_cache(str(data_dir), "semantic")
+
+    (data_dir / "edit.md").write_text("after")
+    (data_dir / "remove.md").unlink()
+    (data_dir / "new.txt").write_text("fresh")
+
+    added, modified, deleted = builder.detect_changes(str(data_dir), "semantic")
+
+    assert {Path(p).name for p in added} == {"new.txt"}
+    assert {Path(p).name for p in modified} == {"edit.md"}
+    assert {Path(p).name for p in deleted} == {"remove.md"}
+
+
+def test_no_changes_after_update(workspace):
+    """Test an updated cache reports no rebuild needed"""
+    builder, data_dir = workspace
+    (data_dir / "a.json").write_text("[]")
+    nested = data_dir / "nested"
+    nested.mkdir()
+    (nested / "b.md").write_text("b")
+
+    builder.detect_changes(str(data_dir), "episodic")
+    builder.update_cache(str(data_dir), "episodic")
+
+    assert not builder.needs_rebuild(str(data_dir), "episodic")
+
+
+def test_directory_hash_is_sha256_of_file_hashes(workspace):
+    """Test version data hashes stay SHA-256 regardless of change-detection algorithm"""
+    import hashlib
+    builder, data_dir = workspace
+    (data_dir / "a.md").write_text("alpha")
+    (data_dir / "b.md").write_text("beta")
+
+    expected = hashlib.sha256()
+    for content in (b"alpha", b"beta"):
+        expected.update(hashlib.sha256(content).hexdigest().encode())
+
+    assert builder._compute_directory_hash(str(data_dir)) == expected.hexdigest()
+
+
+def test_unchanged_stat_skips_hashing(workspace):
+    """Test files with matching mtime and size are not read again"""
+    builder, data_dir = workspace
+    (data_dir / "a.md").write_text("alpha")
+    builder.update_cache(str(data_dir), "semantic")
+
+    with patch.object(builder, '_compute_file_hash') as compute:
+        assert not builder.needs_rebuild(str(data_dir), "semantic")
+    compute.assert_not_called()
+
+
+def test_legacy_cache_is_migrated(workspace):
+    """Test a pre-upgrade cache of bare SHA-256 hashes causes no rebuild"""
+    import hashlib
+    import json
+    builder, data_dir = workspace
+    (data_dir / "a.md").write_text("alpha")
+    (data_dir / "b.md").write_text("beta")
+    path_a, path_b = str(data_dir / "a.md"), str(data_dir / "b.md")
+    legacy = {"semantic": {
+        path_a: hashlib.sha256(b"alpha").hexdigest(),
+        path_b: hashlib.sha256(b"stale beta").hexdigest(),
+    }}
+    builder.cache_path.write_text(json.dumps(legacy))
+
+    builder.cache = builder._load_cache()
+
+    assert builder.cache["semantic"][path_a] == {"hash": legacy["semantic"][path_a], "algo": "sha256"}
+    assert builder.needs_rebuild(str(data_dir), "semantic")
+    assert builder.detect_changes(str(data_dir), "semantic") == (set(), {path_b}, set())
+
+    builder.update_cache(str(data_dir), "semantic")
+    saved = json.loads(builder.cache_path.read_text())
+    assert saved["hash_algo"] == builder.hash_algo
+    assert all("algo" not in entry for entry in saved["files"]["semantic"].values())
+    assert not builder.needs_rebuild(str(data_dir), "semantic")
+
+
+def test_unchanged_legacy_cache_needs_no_rebuild(workspace):
+    """Test files matching their legacy SHA-256 hash are not reported as changed"""
+    import hashlib
+    import json
+    builder, data_dir = workspace
+    (data_dir / "a.md").write_text("alpha")
+    path = str(data_dir / "a.md")
+    builder.cache_path.write_text(json.dumps({"semantic": {path: hashlib.sha256(b"alpha").hexdigest()}}))
+
+    builder.cache = builder._load_cache()
+
+    assert not builder.needs_rebuild(str(data_dir), "semantic")
+    assert builder.detect_changes(str(data_dir), "semantic") == (set(), set(), set())
+
+
+def test_touched_file_is_hashed_once(workspace):
+    """Test a file with a new mtime but the same content is not re-hashed on later checks"""
+    import os
+    builder, data_dir = workspace
+    path = data_dir / "a.md"
+    path.write_text("alpha")
+    builder.update_cache(str(data_dir), "semantic")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert not builder.needs_rebuild(str(data_dir), "semantic")
+
+    builder.cache = builder._load_cache()
+    with patch.object(builder, '_compute_file_hash') as compute:
+        assert not builder.needs_rebuild(str(data_dir), "semantic")
+    compute.assert_not_called()
+
+
+def test_missing_directory_has_no_files(workspace):
+    """Test a missing data directory hashes and caches as empty"""
+    builder, data_dir = workspace
+    missing = str(data_dir / "missing")
+
+    builder.update_cache(missing, "procedural")
+
+    assert builder.cache["procedural"] == {}
+    assert builder._compute_directory_hash(missing) == builder._compute_directory_hash(str(data_dir))
+
+
+def test_needs_rebuild_stops_at_first_change(workspace):
+    """Test needs_rebuild reports additions and deletions without hashing unchanged files"""
+    builder, data_dir = workspace
+    (data_dir / "a.md").write_text("alpha")
+    (data_dir / "b.md").write_text("beta")
+    builder.update_cache(str(data_dir), "semantic")
+
+    (data_dir / "c.md").write_text("gamma")
+    with patch.object(builder, '_compute_file_hash') as compute:
+        assert builder.needs_rebuild(str(data_dir), "semantic")
+    compute.assert_not_called()
+
+    (data_dir / "c.md").unlink()
+    assert not builder.needs_rebuild(str(data_dir), "semantic")
+    (data_dir / "b.md").unlink()
+    assert builder.needs_rebuild(str(data_dir), "semantic")
+
+
+def test_update_cache_records_files_written_after_detection(workspace):
+    """Test files created between detect_changes and update_cache are not reported again"""
+    builder, data_dir = workspace
+    (data_dir / "rules.json").write_text("[]")
+
+    builder.detect_changes(str(data_dir), "procedural")
+    (data_dir / "generated_procedural_rules.json").write_text("[1]")
+    builder.update_cache(str(data_dir), "procedural")
+
+    assert builder.detect_changes(str(data_dir), "procedural") == (set(), set(), set())
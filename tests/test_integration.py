@@ -1,12 +1,16 @@
 """
 Integration tests - Test with real services
-Run manually before deployment: pytest tests/test_integration.py -v
+Run manually before deployment: TWINSELF_INTEGRATION=1 pytest tests/test_integration.py -v
 Requires: MLflow server running on localhost:5000
 """
+import os
 import pytest
 import requests
 import time
 
+if not os.environ.get("TWINSELF_INTEGRATION"):
+    pytest.skip("set TWINSELF_INTEGRATION=1 to run", allow_module_level=True)
+
 pytestmark = pytest.mark.integration
 
 
@@ -118,5 +122,5 @@ if __name__ == "__main__":
     print("INTEGRATION TESTS - Requires running services:")
     print("1. Start MLflow: mlflow server --host 127.0.0.1 --port 5000")
     print("2. Start MLOps: python mlops_server.py")
-    print("3. Run tests: pytest tests/test_integration.py -v")
+    print("3. Run tests: TWINSELF_INTEGRATION=1 pytest tests/test_integration.py -v")
     print("="*60 + "\n")
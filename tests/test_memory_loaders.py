@@ -0,0 +1,39 @@
+"""
+Tests for the episodic and procedural JSON loaders
+"""
+import pytest
+import logging
+import tempfile
+import shutil
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from twinself.core.exceptions import DataLoadingError
+from twinself.build_episodic_memory import load_episodic_examples
+from twinself.build_procedural_memory import load_procedural_rules
+
+
+@pytest.fixture
+def data_dir():
+    """Temporary directory with one JSON file that is not valid UTF-8"""
+    temp_dir = Path(tempfile.mkdtemp())
+    (temp_dir / "broken.json").write_bytes(b'[{"user_query": "\xff"}]')
+    yield temp_dir
+    shutil.rmtree(temp_dir)
+
+
+def test_episodic_loader_reports_bad_encoding(data_dir):
+    """Test a non-UTF-8 file is reported as such, not as a missing list"""
+    with pytest.raises(DataLoadingError, match="not valid UTF-8"):
+        load_episodic_examples(str(data_dir))
+
+
+def test_procedural_loader_reports_bad_encoding(data_dir, caplog):
+    """Test a non-UTF-8 file is logged as an encoding error and skipped"""
+    with caplog.at_level(logging.WARNING):
+        assert load_procedural_rules(str(data_dir)) == []
+
+    assert "not valid UTF-8" in caplog.text
+    assert "Expected JSON file to contain a list" not in caplog.text
@@ -0,0 +1,199 @@
+"""
+Tests for the system prompt loader
+"""
+import pytest
+import tempfile
+import shutil
+from pathlib import Path
+from unittest.mock import patch
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from twinself.core.config import config
+from twinself.utils.prompt_loader import PromptLoader
+
+
+@pytest.fixture
+def prompts_dir(monkeypatch):
+    """Temporary prompts directory with a default prompt, and no active version"""
+    temp_dir = Path(tempfile.mkdtemp())
+    (temp_dir / "default_prompt.md").write_text("default persona", encoding="utf-8")
+    (temp_dir / "technical_prompt.md").write_text("technical persona", encoding="utf-8")
+    monkeypatch.setitem(config.__dict__, "system_prompts_dir", str(temp_dir))
+    with patch('twinself.utils.prompt_loader.VersionManager') as version_manager:
+        version_manager.return_value.get_active_version.return_value = None
+        yield temp_dir
+    shutil.rmtree(temp_dir)
+
+
+def test_prompts_served_from_preloaded_cache(prompts_dir):
+    """Test prompts are read at startup and not touched on lookup"""
+    loader = PromptLoader()
+    (prompts_dir / "technical_prompt.md").write_text("edited", encoding="utf-8")
+
+    assert loader.get_prompt("technical_prompt.md") == "technical persona"
+    assert loader.get_active_prompt() == "default persona"
+    assert loader.reload_prompt("technical_prompt.md") == "edited"
+
+
+def test_missing_prompt_raises(prompts_dir):
+    """Test unknown prompt names raise FileNotFoundError"""
+    loader = PromptLoader()
+
+    with pytest.raises(FileNotFoundError):
+        loader.get_prompt("missing_prompt.md")
+
+
+def test_active_prompt_follows_active_version(prompts_dir):
+    """Test the active prompt is cached per version and re-resolved when the version changes"""
+    from twinself.core.version_manager import MemoryVersion
+
+    loader = PromptLoader()
+    v1 = MemoryVersion("v1", "", {}, {}, {}, True, str(prompts_dir / "technical_prompt.md"))
+    v2 = MemoryVersion("v2", "", {}, {}, {}, True, str(prompts_dir / "missing_prompt.md"))
+
+    loader.version_manager.get_active_version.return_value = v1
+    assert loader.get_active_prompt() == "technical persona"
+
+    (prompts_dir / "technical_prompt.md").write_text("edited", encoding="utf-8")
+    assert loader.get_active_prompt() == "technical persona"
+
+    loader.version_manager.get_active_version.return_value = v2
+    assert loader.get_active_prompt() == "default persona"
+
+
+def test_prompt_cache_is_bounded(prompts_dir, monkeypatch):
+    """Test the least recently used prompt is evicted and reloaded on demand"""
+    monkeypatch.setitem(config.__dict__, "prompt_cache_size", 1)
+    loader = PromptLoader()
+
+    assert loader.get_prompt("default_prompt.md") == "default persona"
+    assert loader.get_prompt("technical_prompt.md") == "technical persona"
+    assert list(loader._cache) == ["technical_prompt.md"]
+
+
+def test_concurrent_lookups_keep_cache_consistent(prompts_dir, monkeypatch):
+    """Test lookups from worker threads while prompts are evicted and re-read"""
+    import threading
+    monkeypatch.setitem(config.__dict__, "prompt_cache_size", 2)
+    names = [f"prompt_{i}.md" for i in range(4)]
+    for name in names:
+        (prompts_dir / name).write_text(name, encoding="utf-8")
+    loader = PromptLoader()
+    errors = []
+
+    def lookup_many(offset):
+        try:
+            for i in range(500):
+                name = names[(offset + i) % len(names)]
+                assert loader.get_prompt(name) == name
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=lookup_many, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert len(loader._cache) <= 2
+
+
+def test_list_available_prompts(prompts_dir):
+    """Test only markdown files are listed"""
+    (prompts_dir / "notes.txt").write_text("not a prompt")
+    loader = PromptLoader()
+
+    assert sorted(loader.list_available_prompts()) == ["default_prompt.md", "technical_prompt.md"]
+
+
+def test_symlinked_prompts_are_listed(prompts_dir):
+    """Test prompts linked into the directory are listed and loaded"""
+    shared = prompts_dir.parent / f"{prompts_dir.name}_shared.md"
+    shared.write_text("shared persona", encoding="utf-8")
+    try:
+        (prompts_dir / "shared_prompt.md").symlink_to(shared)
+        loader = PromptLoader()
+
+        assert "shared_prompt.md" in loader.list_available_prompts()
+        assert loader.get_prompt("shared_prompt.md") == "shared persona"
+    finally:
+        shared.unlink()
+
+
+def test_preload_skips_unreadable_prompts(prompts_dir):
+    """Test a prompt that is not valid UTF-8 is skipped instead of failing construction"""
+    (prompts_dir / "broken_prompt.md").write_bytes(b"\xff\xfe broken")
+
+    loader = PromptLoader()
+
+    assert "broken_prompt.md" not in loader._cache
+    assert loader.get_prompt("technical_prompt.md") == "technical persona"
+
+
+def test_non_ascii_prompt_decoded_as_utf8(prompts_dir):
+    """Test prompts are decoded as UTF-8 regardless of the locale"""
+    (prompts_dir / "vi_prompt.md").write_text("Xin chào, persona", encoding="utf-8")
+
+    loader = PromptLoader()
+
+    assert loader.get_prompt("vi_prompt.md") == "Xin chào, persona"
+    assert loader.get_prompt_bytes("vi_prompt.md") == "Xin chào, persona".encode("utf-8")
+
+
+def test_large_prompt_read_through_mmap(prompts_dir, monkeypatch):
+    """Test prompts above the mmap threshold decode to the same text"""
+    import twinself.utils.prompt_loader as prompt_loader
+    monkeypatch.setattr(prompt_loader, "_MMAP_THRESHOLD_BYTES", 4)
+    (prompts_dir / "large_prompt.md").write_text("Xin chào, persona", encoding="utf-8")
+
+    loader = PromptLoader()
+
+    assert loader.get_prompt("large_prompt.md") == "Xin chào, persona"
+
+
+def test_prompt_bytes_match_text(prompts_dir):
+    """Test the bytes form is the UTF-8 encoding of the prompt, encoded once per entry"""
+    loader = PromptLoader()
+
+    entry = loader.get_prompt_entry("default_prompt.md")
+
+    assert loader.get_prompt_bytes("default_prompt.md") == "default persona".encode("utf-8")
+    assert loader.get_prompt_bytes("default_prompt.md") is entry.text_bytes
+    assert entry.length == len(entry.text)
+
+
+def test_preload_async_fills_cache(prompts_dir):
+    """Test async preload reads prompts added after construction"""
+    import asyncio
+    loader = PromptLoader()
+    (prompts_dir / "new_prompt.md").write_text("new persona", encoding="utf-8")
+
+    asyncio.run(loader.preload_async())
+
+    assert loader._cache["new_prompt.md"].text == "new persona"
+
+
+def test_live_reload_picks_up_edits(prompts_dir, monkeypatch):
+    """Test edited prompts are re-read when live reload is enabled"""
+    import os
+    monkeypatch.setitem(config.__dict__, "prompts_live_reload", True)
+    loader = PromptLoader()
+    path = prompts_dir / "technical_prompt.md"
+
+    path.write_text("edited", encoding="utf-8")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert loader.get_prompt("technical_prompt.md") == "edited"
+
+
+def test_cache_keys_are_interned(prompts_dir):
+    """Test the default prompt constant is the cache key object itself"""
+    from twinself.utils.prompt_loader import DEFAULT_PROMPT
+    loader = PromptLoader()
+
+    assert any(key is DEFAULT_PROMPT for key in loader._cache)
+    assert loader.get_prompt(DEFAULT_PROMPT) == "default persona"
@@ -0,0 +1,85 @@
+"""
+Tests for the chatbot response cache
+"""
+import pytest
+from pathlib import Path
+from unittest.mock import patch
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from twinself.services.response_cache import ResponseCache
+
+
+def test_similar_query_hits():
+    """Test a near-identical embedding returns the cached response"""
+    cache = ResponseCache(threshold=0.9)
+    cache.add([1.0, 0.0, 0.0], "fp", "cached answer")
+
+    assert cache.lookup([0.99, 0.05, 0.0], "fp") == "cached answer"
+
+
+def test_dissimilar_query_misses():
+    """Test an unrelated embedding does not hit"""
+    cache = ResponseCache(threshold=0.9)
+    cache.add([1.0, 0.0, 0.0], "fp", "cached answer")
+
+    assert cache.lookup([0.0, 1.0, 0.0], "fp") is None
+
+
+def test_fingerprint_must_match():
+    """Test cached responses are scoped to the conversation fingerprint"""
+    cache = ResponseCache(threshold=0.9)
+    cache.add([1.0, 0.0], "fp-a", "answer a")
+
+    assert cache.lookup([1.0, 0.0], "fp-b") is None
+
+
+def test_lru_eviction():
+    """Test the least recently used entry is evicted when full"""
+    cache = ResponseCache(threshold=0.99, max_entries=2)
+    cache.add([1.0, 0.0, 0.0], "fp", "first")
+    cache.add([0.0, 1.0, 0.0], "fp", "second")
+    cache.lookup([1.0, 0.0, 0.0], "fp")  # touch "first"
+    cache.add([0.0, 0.0, 1.0], "fp", "third")
+
+    assert len(cache) == 2
+    assert cache.lookup([1.0, 0.0, 0.0], "fp") == "first"
+    assert cache.lookup([0.0, 1.0, 0.0], "fp") is None
+
+
+def test_entries_expire():
+    """Test entries older than the TTL are dropped"""
+    cache = ResponseCache(ttl_seconds=10)
+    with patch("twinself.services.response_cache.time.monotonic", return_value=100.0):
+        cache.add([1.0, 0.0], "fp", "old answer")
+    with patch("twinself.services.response_cache.time.monotonic", return_value=111.0):
+        assert cache.lookup([1.0, 0.0], "fp") is None
+    assert len(cache) == 0
+
+
+def test_concurrent_lookup_and_add():
+    """Test lookups from worker threads while entries are added and evicted"""
+    import threading
+    cache = ResponseCache(threshold=0.99, max_entries=8)
+    errors = []
+
+    def add_many():
+        for i in range(2000):
+            cache.add([1.0, float(i)], "fp", f"answer {i}")
+
+    def lookup_many():
+        try:
+            for i in range(2000):
+                cache.lookup([1.0, float(i)], "fp")
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=add_many)] + [threading.Thread(target=lookup_many) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert len(cache) == 8
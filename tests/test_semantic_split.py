@@ -0,0 +1,60 @@
+"""
+Tests for semantic memory chunk preparation: token-aware splitting and deduplication
+"""
+import re
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from langchain_core.documents import Document
+
+import numpy as np
+
+from twinself.build_semantic_memory import split_by_tokens, find_near_duplicates
+
+
+class WordTokenizer:
+    """Fast-tokenizer stand-in treating each word as one token"""
+    is_fast = True
+
+    def __call__(self, text, **kwargs):
+        return {"offset_mapping": [m.span() for m in re.finditer(r"\S+", text)]}
+
+
+def test_windows_overlap_and_cover_text():
+    """Test windows have the requested size, overlap and cover every token"""
+    text = " ".join(f"w{i}" for i in range(10))
+    doc = Document(page_content=text, metadata={"source": "a.md"})
+
+    chunks = split_by_tokens(doc, WordTokenizer(), chunk_tokens=4, overlap_tokens=1)
+
+    assert [c.page_content for c in chunks] == ["w0 w1 w2 w3", "w3 w4 w5 w6", "w6 w7 w8 w9"]
+    assert all(c.metadata["source"] == "a.md" for c in chunks)
+    assert text[chunks[1].metadata["start_index"]:].startswith("w3")
+
+
+def test_short_document_is_single_chunk():
+    """Test a document shorter than one window is kept whole"""
+    doc = Document(page_content="  hello world ", metadata={})
+
+    chunks = split_by_tokens(doc, WordTokenizer(), chunk_tokens=4, overlap_tokens=1)
+
+    assert [c.page_content for c in chunks] == ["hello world"]
+
+
+def test_empty_document_has_no_chunks():
+    """Test whitespace-only documents produce no chunks"""
+    assert split_by_tokens(Document(page_content="   ", metadata={}), WordTokenizer(), 4, 1) == []
+
+
+def test_near_duplicates_dropped_in_order():
+    """Test a vector close to an earlier kept one is dropped, distinct ones kept"""
+    vectors = np.array([
+        [1.0, 0.0],
+        [0.999, 0.0447],  # ~cos 0.999 to the first
+        [0.0, 1.0],
+    ], dtype=np.float32)
+
+    assert find_near_duplicates(vectors, threshold=0.95) == [0, 2]
+    assert find_near_duplicates(vectors, threshold=0.9999) == [0, 1, 2]
@@ -64,3 +64,124 @@ def test_get_active_version(temp_data_dir):
     # get_active_version may return None if no versions exist
     version = vm.get_active_version()
     assert version is None or isinstance(version, object)
+
+
+def test_snapshot_restore_roundtrip(temp_data_dir, monkeypatch):
+    """Test a restored snapshot matches the store it was taken from"""
+    from twinself.core.config import config
+
+    qdrant_path = temp_data_dir / "qdrant"
+    (qdrant_path / "collection" / "semantic").mkdir(parents=True)
+    (qdrant_path / "collection" / "semantic" / "storage.sqlite").write_bytes(b"v1 data")
+    (qdrant_path / ".lock").write_text("locked")
+    monkeypatch.setitem(config.__dict__, "qdrant_local_path", str(qdrant_path))
+
+    vm = VersionManager(
+        registry_path=str(temp_data_dir / "version_registry.json"),
+        snapshots_dir=str(temp_data_dir / "snapshots")
+    )
+    assert vm.create_snapshot("v1")
+
+    (qdrant_path / "collection" / "semantic" / "storage.sqlite").write_bytes(b"v2 data")
+    assert vm.restore_snapshot("v1")
+
+    assert (qdrant_path / "collection" / "semantic" / "storage.sqlite").read_bytes() == b"v1 data"
+    assert not (qdrant_path / ".lock").exists()
+
+
+def test_snapshots_share_unchanged_files(temp_data_dir, monkeypatch):
+    """Test identical files are stored once and kept while a snapshot references them"""
+    from twinself.core.config import config
+
+    qdrant_path = temp_data_dir / "qdrant"
+    qdrant_path.mkdir()
+    (qdrant_path / "meta.json").write_text("{}")
+    (qdrant_path / "storage.sqlite").write_bytes(b"v1 data")
+    monkeypatch.setitem(config.__dict__, "qdrant_local_path", str(qdrant_path))
+
+    vm = VersionManager(
+        registry_path=str(temp_data_dir / "version_registry.json"),
+        snapshots_dir=str(temp_data_dir / "snapshots")
+    )
+    vm.create_snapshot("v1")
+    (qdrant_path / "storage.sqlite").write_bytes(b"v2 data")
+    vm.create_snapshot("v2")
+
+    assert len(list(vm.objects_dir.iterdir())) == 3
+    assert sorted(vm.list_snapshots()) == ["v1", "v2"]
+
+    vm.delete_snapshot("v1")
+    assert len(list(vm.objects_dir.iterdir())) == 2
+    assert vm.restore_snapshot("v2")
+    assert (qdrant_path / "storage.sqlite").read_bytes() == b"v2 data"
+
+
+def test_rollback_switches_active_version(temp_data_dir):
+    """Test exactly one version is active after create and rollback, also after reload"""
+    registry_path = str(temp_data_dir / "version_registry.json")
+    snapshots_dir = str(temp_data_dir / "snapshots")
+
+    vm = VersionManager(registry_path=registry_path, snapshots_dir=snapshots_dir)
+    first = vm.create_version({"semantic": 1}, {"semantic": "a"})
+    second = vm.create_version({"semantic": 2}, {"semantic": "b"})
+    assert vm.get_active_version().version_id == second
+
+    assert vm.rollback_to_version(first, restore_data=False)
+
+    reloaded = VersionManager(registry_path=registry_path, snapshots_dir=snapshots_dir)
+    assert reloaded.get_active_version().version_id == first
+    assert [v.is_active for v in reloaded.list_versions()] == [True, False]
+    assert reloaded.get_version(second).collections == {"semantic": 2}
+
+
+def test_legacy_snapshot_size(temp_data_dir):
+    """Test the size of a full-copy snapshot counts files in nested folders"""
+    vm = VersionManager(
+        registry_path=str(temp_data_dir / "version_registry.json"),
+        snapshots_dir=str(temp_data_dir / "snapshots")
+    )
+    nested = vm.snapshots_dir / "v1_legacy" / "collection" / "semantic"
+    nested.mkdir(parents=True)
+    (nested / "storage.sqlite").write_bytes(b"x" * 100)
+    (vm.snapshots_dir / "v1_legacy" / "meta.json").write_bytes(b"x" * 10)
+
+    assert vm.get_snapshot_size("v1_legacy") == 110
+
+
+def test_single_rollback_definition_restores_data_by_default():
+    """Test the data-restoring rollback is the only definition"""
+    import inspect
+    import twinself.core.version_manager as version_manager
+
+    assert VersionManager.rollback_to_version.__defaults__ == (True,)
+    assert inspect.getsource(version_manager).count("def rollback_to_version") == 1
+
+
+def test_object_name_matches_stored_bytes(temp_data_dir, monkeypatch):
+    """Test an object is named after the copied bytes even if the source changes during the snapshot"""
+    import hashlib
+    import twinself.core.version_manager as version_manager
+
+    source = temp_data_dir / "storage.sqlite"
+    source.write_bytes(b"before")
+    real_copy = version_manager._reflink_copy
+
+    def copy_then_modify(src, dst):
+        result = real_copy(src, dst)
+        source.write_bytes(b"written meanwhile")
+        return result
+
+    monkeypatch.setattr(version_manager, "_reflink_copy", copy_then_modify)
+    vm = VersionManager(
+        registry_path=str(temp_data_dir / "version_registry.json"),
+        snapshots_dir=str(temp_data_dir / "snapshots")
+    )
+    vm.objects_dir.mkdir(parents=True)
+
+    entry = vm._store_object(str(source))
+
+    stored = (vm.objects_dir / entry["sha256"]).read_bytes()
+    assert stored == b"before"
+    assert entry["sha256"] == hashlib.sha256(stored).hexdigest()
+    assert entry["size"] == len(stored)
+    assert [p.name for p in vm.objects_dir.iterdir()] == [entry["sha256"]]
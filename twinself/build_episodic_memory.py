@@ -4,17 +4,23 @@ Refactored to use centralized configuration and services.
 """
 import os
 import argparse
+import logging
 from typing import List, Dict
-import datetime
 import json
 
-from langchain_qdrant import Qdrant
+from tqdm import tqdm
 from langchain_core.documents import Document
-from qdrant_client import QdrantClient, models
 
 from .core.config import config
 from .services.embedding_service import EmbeddingService
 from .core.exceptions import DataLoadingError, VectorStoreError
+from .core.qdrant_utils import initialize_qdrant_client, create_or_recreate_collection, get_vector_store, rows_to_documents
+from .utils.json_stream import iter_json_list
+
+# Keys every loaded item must provide, checked with a single set comparison
+EPISODIC_REQUIRED_KEYS = frozenset({"user_query", "your_response"})
+
+logger = logging.getLogger(__name__)
 
 # --- Helper Functions ---
 def load_episodic_examples(directory: str) -> List[Dict[str, str]]:
@@ -27,19 +33,21 @@ def load_episodic_examples(directory: str) -> List[Dict[str, str]]:
         filepath = os.path.join(directory, filename)
         if os.path.isfile(filepath) and filename.endswith(".json"):
             try:
-                with open(filepath, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    if isinstance(data, list):
-                        for item in data:
-                            if "user_query" in item and "your_response" in item:
-                                examples.append(item)
-                            else:
-                                print(f"Warning: Skipping malformed item in {filename}.")
+                loaded = 0
+                for item in iter_json_list(filepath):
+                    loaded += 1
+                    if isinstance(item, dict) and EPISODIC_REQUIRED_KEYS <= item.keys():
+                        examples.append(item)
                     else:
-                        print(f"Warning: {filename} does not contain a list of examples.")
-                print(f"Loaded: {len(data) if isinstance(data, list) else 0} examples from {filename}")
+                        logger.warning("Skipping malformed item in %s.", filename)
+                logger.debug("Loaded: %d examples from %s", loaded, filename)
             except json.JSONDecodeError as e:
                 raise DataLoadingError(f"Error decoding JSON from {filename}: {e}")
+            except UnicodeDecodeError as e:
+                # A ValueError subclass: report it as an encoding problem, not a missing list
+                raise DataLoadingError(f"{filename} is not valid UTF-8: {e}")
+            except ValueError:
+                logger.warning("%s does not contain a list of examples.", filename)
             except Exception as e:
                 raise DataLoadingError(f"Error loading {filename}: {e}")
     
@@ -50,48 +58,18 @@ def load_episodic_examples(directory: str) -> List[Dict[str, str]]:
 
 
 def convert_examples_to_documents(examples: List[Dict[str, str]]) -> List[Document]:
-    documents = []
-    ingestion_timestamp = datetime.datetime.now(datetime.timezone.utc).isoformat()
-
-    for i, example in enumerate(examples):
-        metadata = {
+    documents = rows_to_documents(
+        examples,
+        content_key="your_response",
+        metadata_builder=lambda i, example: {
             "example_id": f"episodic_example_{i}",
             "original_user_query": example["user_query"],
-            "ingestion_timestamp_utc": ingestion_timestamp,
-        }
-        documents.append(Document(page_content=example["your_response"], metadata=metadata))
-
+        },
+    )
     print(f"Converted {len(examples)} examples into {len(documents)} LangChain Documents.")
     return documents
 
 
-def initialize_qdrant_client() -> QdrantClient:
-    """Initialize Qdrant client using configuration."""
-    try:
-        client = QdrantClient(
-            path=config.qdrant_local_path,
-            prefer_grpc=False
-        )
-        print(f"Initialized Qdrant client at path: {config.qdrant_local_path}")
-        collections = client.get_collections()
-        print(f"Connected. Existing collections: {[c.name for c in collections.collections]}")
-        return client
-    except Exception as e:
-        raise VectorStoreError(f"Failed to initialize Qdrant client: {e}")
-
-
-def create_or_recreate_collection(client: QdrantClient, collection_name: str, embeddings_size: int):
-    if client.collection_exists(collection_name=collection_name):
-        print(f"Collection '{collection_name}' already exists. Deleting and re-creating...")
-        client.delete_collection(collection_name=collection_name)
-
-    client.create_collection(
-        collection_name=collection_name,
-        vectors_config=models.VectorParams(size=embeddings_size, distance=models.Distance.COSINE),
-    )
-    print(f"Collection '{collection_name}' created/re-created successfully.")
-
-
 def build_episodic_memory(
     source_directory: str = None,
     collection_name: str = None
@@ -119,22 +97,20 @@ def build_episodic_memory(
     
     # Get embedding size and create collection
     embeddings_size = embedding_service.get_embedding_size()
-    create_or_recreate_collection(qdrant_client, collection, embeddings_size)
+    create_or_recreate_collection(qdrant_client, collection, embeddings_size, quantization=config.quantization_mode)
     
     try:
-        qdrant_vectorstore = Qdrant(
-            client=qdrant_client,
-            collection_name=collection,
-            embeddings=embedding_service._embeddings,
-        )
+        qdrant_vectorstore = get_vector_store(collection, embedding_service.cached_embeddings())
         
         # Batch insert to avoid timeout
         batch_size = config.batch_size
         print(f"Adding {len(documents)} episodic examples in batches of {batch_size}...")
-        for i in range(0, len(documents), batch_size):
-            batch = documents[i:i + batch_size]
-            qdrant_vectorstore.add_documents(batch)
-            print(f"Inserted batch {i//batch_size + 1} ({len(batch)} docs)")
+        with tqdm(total=len(documents), desc="Episodic examples", unit="doc", disable=None) as progress:
+            for i in range(0, len(documents), batch_size):
+                batch = documents[i:i + batch_size]
+                qdrant_vectorstore.add_documents(batch)
+                logger.debug("Inserted batch %d (%d docs)", i // batch_size + 1, len(batch))
+                progress.update(len(batch))
         
         print("Episodic Memory built successfully in Qdrant!")
         total_points = qdrant_client.count(collection_name=collection).count
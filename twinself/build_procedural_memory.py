@@ -1,20 +1,29 @@
 import os
 import argparse
-import datetime
 import json
+import logging
+import queue
+import threading
 import uuid
 from typing import List, Dict, Any
 
 from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_qdrant import Qdrant
 from langchain_core.documents import Document
+from tqdm import tqdm
 from qdrant_client import QdrantClient, models
 
 from .core.config import config
 from .core.exceptions import DataLoadingError, VectorStoreError
+from .core.qdrant_utils import initialize_qdrant_client, create_or_recreate_collection, rows_to_documents
 from .services.embedding_service import EmbeddingService
+from .utils.json_stream import iter_json_list
 
 
+# Keys every loaded item must provide, checked with a single set comparison
+PROCEDURAL_REQUIRED_KEYS = frozenset({"rule_name", "rule_content"})
+
+logger = logging.getLogger(__name__)
+
 # --- Helper Functions ---
 
 def load_procedural_rules(directory: str) -> List[Dict[str, str]]:
@@ -37,21 +46,23 @@ def load_procedural_rules(directory: str) -> List[Dict[str, str]]:
         filepath = os.path.join(directory, filename)
         if os.path.isfile(filepath) and filename.endswith(".json"):
             try:
-                with open(filepath, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    if isinstance(data, list):
-                        for item in data:
-                            if "rule_name" in item and "rule_content" in item:
-                                rules.append(item)
-                            else:
-                                print(f"Warning: Skipping malformed item in {filename}. Expected 'rule_name' and 'rule_content' keys.")
+                loaded = 0
+                for item in iter_json_list(filepath):
+                    loaded += 1
+                    if isinstance(item, dict) and PROCEDURAL_REQUIRED_KEYS <= item.keys():
+                        rules.append(item)
                     else:
-                        print(f"Warning: Skipping {filename}. Expected JSON file to contain a list of rules.")
-                print(f"Loaded: {len(data) if isinstance(data, list) else 0} initial rules from {filename}")
+                        logger.warning("Skipping malformed item in %s. Expected 'rule_name' and 'rule_content' keys.", filename)
+                logger.debug("Loaded: %d initial rules from %s", loaded, filename)
             except json.JSONDecodeError as e:
-                print(f"Error decoding JSON from {filename}: {e}")
+                logger.error("Error decoding JSON from %s: %s", filename, e)
+            except UnicodeDecodeError as e:
+                # A ValueError subclass: report it as an encoding problem, not a missing list
+                logger.error("%s is not valid UTF-8: %s", filename, e)
+            except ValueError:
+                logger.warning("Skipping %s. Expected JSON file to contain a list of rules.", filename)
             except Exception as e:
-                print(f"Error loading {filename}: {e}")
+                logger.error("Error loading %s: %s", filename, e)
     return rules
 
 def convert_rules_to_documents(rules: List[Dict[str, str]]) -> List[Document]:
@@ -60,23 +71,15 @@ def convert_rules_to_documents(rules: List[Dict[str, str]]) -> List[Document]:
     Each Document's page_content will be the 'rule_content',
     and 'rule_name' will be stored in metadata. A new UUID will be generated for the Qdrant ID.
     """
-    documents = []
-    ingestion_timestamp = datetime.datetime.now(datetime.timezone.utc).isoformat()
-
-    for i, rule in enumerate(rules):
-        rule_name = rule["rule_name"]
-        
-        # Generate a UUID for the Qdrant Point ID
-        generated_id = str(uuid.uuid4())
-
-        metadata = {
-            "qdrant_point_id": generated_id, # Store the actual Qdrant ID in metadata
-            "rule_name": rule_name,          # Keep the human-readable rule_name in metadata
-            "ingestion_timestamp_utc": ingestion_timestamp,
+    documents = rows_to_documents(
+        rules,
+        content_key="rule_content",
+        metadata_builder=lambda i, rule: {
+            "qdrant_point_id": str(uuid.uuid4()),  # Store the actual Qdrant ID in metadata
+            "rule_name": rule["rule_name"],        # Keep the human-readable rule_name in metadata
             "type": "procedural_rule",
-        }
-        documents.append(Document(page_content=rule["rule_content"], metadata=metadata))
-    
+        },
+    )
     print(f"Converted {len(rules)} initial rules into {len(documents)} LangChain Documents.")
     return documents
 
@@ -88,36 +91,73 @@ def initialize_embeddings() -> EmbeddingService:
     print(f"Initializing Embeddings with model: {config.embedding_model_name}")
     return EmbeddingService()
 
-def initialize_qdrant_client() -> QdrantClient:
+def _upsert_worker(client: QdrantClient, collection_name: str, batches: queue.Queue, errors: List[Exception]):
     """
-    Initializes Qdrant client for local storage.
+    Consumes (documents, vectors, is_last) batches from the queue and upserts them.
+    Only the final batch waits for Qdrant to acknowledge the write.
     """
-    try:
-        client = QdrantClient(
-            path=config.qdrant_local_path,
-            prefer_grpc=False
-        )
-        print(f"Initialized Qdrant client at path: {config.qdrant_local_path}")
-        collections = client.get_collections()
-        print(f"Successfully connected to Qdrant. Existing collections: {[c.name for c in collections.collections]}")
-        return client
-    except Exception as e:
-        raise VectorStoreError(f"Failed to initialize Qdrant client: {e}")
-
-def create_or_recreate_collection(client: QdrantClient, collection_name: str, embeddings_size: int):
+    while True:
+        item = batches.get()
+        if item is None:
+            return
+        if errors:
+            continue  # Drain remaining batches after a failure
+
+        batch, vectors, is_last = item
+        try:
+            # Use the UUID generated and stored in metadata as the Qdrant Point ID
+            ids = [doc.metadata["qdrant_point_id"] for doc in batch]
+            payloads = [None] * len(batch)
+            for i, doc in enumerate(batch):
+                payload = doc.metadata.copy()
+                payload["page_content"] = doc.page_content
+                payloads[i] = payload
+            client.upsert(
+                collection_name=collection_name,
+                points=models.Batch(ids=ids, vectors=vectors, payloads=payloads),
+                wait=is_last
+            )
+        except Exception as e:
+            errors.append(e)
+
+def upsert_pipelined(
+    client: QdrantClient,
+    collection_name: str,
+    embedding_service: EmbeddingService,
+    documents: List[Document],
+    batch_size: int
+):
     """
-    Creates a new collection or re-creates it if it already exists,
-    ensuring it's configured for vector storage.
+    Embeds documents batch by batch and upserts them on a background thread,
+    so batch i+1 is embedded while batch i is being uploaded.
+    At most two embedded batches are held in memory at any time.
     """
-    if client.collection_exists(collection_name=collection_name):
-        print(f"Collection '{collection_name}' already exists. Deleting and re-creating...")
-        client.delete_collection(collection_name=collection_name)
-    
-    client.create_collection(
-        collection_name=collection_name,
-        vectors_config=models.VectorParams(size=embeddings_size, distance=models.Distance.COSINE),
+    embeddings = embedding_service.cached_embeddings()
+    batches: queue.Queue = queue.Queue(maxsize=2)
+    errors: List[Exception] = []
+    uploader = threading.Thread(
+        target=_upsert_worker,
+        args=(client, collection_name, batches, errors),
+        daemon=True
     )
-    print(f"Collection '{collection_name}' created/re-created successfully.")
+    uploader.start()
+
+    try:
+        with tqdm(total=len(documents), desc="Procedural rules", unit="doc", disable=None) as progress:
+            for start in range(0, len(documents), batch_size):
+                if errors:
+                    break
+                batch = documents[start:start + batch_size]
+                vectors = embeddings.embed_documents([doc.page_content for doc in batch])
+                batches.put((batch, vectors, start + batch_size >= len(documents)))
+                logger.debug("Embedded batch %d (%d docs)", start // batch_size + 1, len(batch))
+                progress.update(len(batch))
+    finally:
+        batches.put(None)
+        uploader.join()
+
+    if errors:
+        raise errors[0]
 
 
 def build_procedural_memory(
@@ -152,29 +192,11 @@ def build_procedural_memory(
     embeddings_size = embedding_service.get_embedding_size()
     print(f"Determined embedding size: {embeddings_size}")
 
-    create_or_recreate_collection(qdrant_client, collection, embeddings_size)
+    create_or_recreate_collection(qdrant_client, collection, embeddings_size, quantization=config.quantization_mode)
 
     try:
-        points = []
-        for doc in documents:
-            # Use the UUID generated and stored in metadata as the Qdrant Point ID
-            point_id = doc.metadata["qdrant_point_id"] 
-            vector = embedding_service.embed_query(doc.page_content)
-
-            points.append(
-                models.PointStruct(
-                    id=point_id,
-                    vector=vector,
-                    payload={"page_content": doc.page_content, **doc.metadata}
-                )
-            )
-
-        print(f"Upserting {len(points)} initial procedural rules to Qdrant collection '{collection}'...")
-        qdrant_client.upsert(
-            collection_name=collection,
-            points=points,
-            wait=True 
-        )
+        print(f"Upserting {len(documents)} initial procedural rules to Qdrant collection '{collection}'...")
+        upsert_pipelined(qdrant_client, collection, embedding_service, documents, config.batch_size)
         print("Procedural Memory built/initialized successfully in Qdrant!")
         print(f"Total points in collection '{collection}': {qdrant_client.count(collection_name=collection).count}")
 
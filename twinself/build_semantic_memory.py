@@ -1,74 +1,145 @@
 import os
 import argparse
-from typing import List, Dict, Any
+import logging
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Set
 import datetime
 
+import numpy as np
 from langchain_huggingface import HuggingFaceEmbeddings
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_qdrant import Qdrant
 from langchain_core.documents import Document
 from qdrant_client import QdrantClient, models
 
 from .core.config import config
 from .core.exceptions import DataLoadingError, VectorStoreError
+from .core.qdrant_utils import initialize_qdrant_client, create_or_recreate_collection
 from .services.embedding_service import EmbeddingService
 
+logger = logging.getLogger(__name__)
+
+_UTC = datetime.timezone.utc
+
+
+def _iso_utc(timestamp: float) -> str:
+    """ISO 8601 UTC string (second resolution) for a POSIX timestamp, without building a datetime."""
+    return time.strftime("%Y-%m-%dT%H:%M:%S+00:00", time.gmtime(timestamp))
+
 
 # --- Helper Functions ---
 
-def load_documents_from_directory(directory: str) -> List[Document]:
+def _load_one(entry: os.DirEntry, ingestion_timestamp: str) -> Optional[Document]:
+    """
+    Reads one document file and builds its Document with file metadata.
+    Returns None if the file cannot be read.
+    """
+    filename = entry.name
+    filepath = entry.path
+    try:
+        with open(filepath, "r", encoding="utf-8") as f:
+            content = f.read()
+
+        # Get file stats for creation/modification times
+        file_stats = entry.stat()
+        creation_time = _iso_utc(file_stats.st_ctime)
+        modification_time = _iso_utc(file_stats.st_mtime)
+
+        # Add comprehensive metadata
+        metadata = {
+            "source": filename,
+            "file_path": filepath,
+            "file_type": os.path.splitext(filename)[1],
+            "file_size_bytes": file_stats.st_size,
+            "creation_time_utc": creation_time,
+            "modification_time_utc": modification_time,
+            "ingestion_timestamp_utc": ingestion_timestamp,
+        }
+        logger.debug("Loaded: %s with metadata.", filename)
+        return Document(page_content=content, metadata=metadata)
+    except Exception as e:
+        logger.error("Error loading %s: %s", filename, e)
+        return None
+
+def load_documents_from_directory(directory: str, only_paths: Optional[Set[str]] = None) -> List[Document]:
     """
     Loads text content from all .txt and .md files in the specified directory
     and converts them into LangChain Document objects, including metadata
     like source filename, creation time, modification time, and ingestion timestamp.
+    Files are read on a thread pool so their I/O latency overlaps.
+    If only_paths is given, only files whose path is in it are loaded.
     """
-    documents = []
     if not os.path.exists(directory):
         print(f"Warning: Source directory '{directory}' does not exist. Please create it and add your documents.")
-        return documents
-
-    ingestion_timestamp = datetime.datetime.now(datetime.timezone.utc).isoformat()
-
-    for filename in os.listdir(directory):
-        filepath = os.path.join(directory, filename)
-        if os.path.isfile(filepath) and (filename.endswith(".txt") or filename.endswith(".md")):
-            try:
-                with open(filepath, "r", encoding="utf-8") as f:
-                    content = f.read()
-
-                    # Get file stats for creation/modification times
-                    file_stats = os.stat(filepath)
-                    creation_time = datetime.datetime.fromtimestamp(file_stats.st_ctime, datetime.timezone.utc).isoformat()
-                    modification_time = datetime.datetime.fromtimestamp(file_stats.st_mtime, datetime.timezone.utc).isoformat()
-
-                    # Add comprehensive metadata
-                    metadata = {
-                        "source": filename,
-                        "file_path": filepath,
-                        "file_type": os.path.splitext(filename)[1],
-                        "file_size_bytes": file_stats.st_size,
-                        "creation_time_utc": creation_time,
-                        "modification_time_utc": modification_time,
-                        "ingestion_timestamp_utc": ingestion_timestamp,
-                    }
-                    documents.append(Document(page_content=content, metadata=metadata))
-                print(f"Loaded: {filename} with metadata.")
-            except Exception as e:
-                print(f"Error loading {filename}: {e}")
-    return documents
-
-def split_documents(documents: List[Document]) -> List[Document]:
+        return []
+
+    ingestion_timestamp = datetime.datetime.now(_UTC).isoformat()
+
+    # DirEntry caches the file type and stat result, saving a syscall per check
+    with os.scandir(directory) as it:
+        entries = [
+            entry for entry in it
+            if entry.name.endswith((".txt", ".md"))
+            and (only_paths is None or entry.path in only_paths)
+            and entry.is_file()
+        ]
+    if not entries:
+        return []
+
+    max_workers = min(32, (os.cpu_count() or 1) * 4, len(entries))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        documents = executor.map(lambda entry: _load_one(entry, ingestion_timestamp), entries)
+        return [doc for doc in documents if doc is not None]
+
+def split_by_tokens(document: Document, tokenizer, chunk_tokens: int, overlap_tokens: int) -> List[Document]:
+    """
+    Splits one document into windows of chunk_tokens tokens overlapping by overlap_tokens,
+    in a single tokenizer pass. Token character offsets map each window back to a slice
+    of the original text; start_index records where the slice begins.
+    """
+    text = document.page_content
+    offsets = tokenizer(
+        text,
+        return_offsets_mapping=True,
+        add_special_tokens=False,
+        truncation=False,
+        verbose=False
+    )["offset_mapping"]
+
+    chunks = []
+    step = max(chunk_tokens - overlap_tokens, 1)
+    for start in range(0, len(offsets), step):
+        window = offsets[start:start + chunk_tokens]
+        char_start, char_end = window[0][0], window[-1][1]
+        metadata = document.metadata.copy()
+        metadata["start_index"] = char_start
+        chunks.append(Document(page_content=text[char_start:char_end], metadata=metadata))
+        if start + chunk_tokens >= len(offsets):
+            break
+    return chunks
+
+def split_documents(documents: List[Document], tokenizer=None) -> List[Document]:
     """
     Splits large documents into smaller, manageable chunks.
     The metadata from the original document is preserved for each chunk.
+    With a fast (offset-aware) tokenizer, chunks are sized in model tokens;
+    otherwise falls back to character-based recursive splitting.
     """
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=1000, 
-        chunk_overlap=200,
-        length_function=len,
-        add_start_index=True,
-    )
-    chunks = text_splitter.split_documents(documents)
+    if tokenizer is not None and getattr(tokenizer, "is_fast", False):
+        chunks = [
+            chunk
+            for document in documents
+            for chunk in split_by_tokens(document, tokenizer, config.chunk_size_tokens, config.chunk_overlap_tokens)
+        ]
+    else:
+        text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=1000, 
+            chunk_overlap=200,
+            length_function=len,
+            add_start_index=True,
+        )
+        chunks = text_splitter.split_documents(documents)
     print(f"Split {len(documents)} documents into {len(chunks)} chunks.")
     return chunks
 
@@ -79,37 +150,61 @@ def initialize_embeddings() -> EmbeddingService:
     print(f"Initializing Embeddings with model: {config.embedding_model_name}")
     return EmbeddingService()
 
-def initialize_qdrant_client() -> QdrantClient:
+def find_near_duplicates(vectors: np.ndarray, threshold: float) -> List[int]:
     """
-    Initializes Qdrant client for local storage.
+    Greedy near-duplicate filter over unit-length vectors. Walks the rows in order,
+    keeping a row unless its dot product with an already kept row exceeds threshold.
+    Returns the indices of the kept rows.
     """
-    try:
-        client = QdrantClient(
-            path=config.qdrant_local_path,
-            prefer_grpc=False
-        )
-        print(f"Initialized Qdrant client at path: {config.qdrant_local_path}")
-        
-        collections = client.get_collections()
-        print(f"Successfully connected to Qdrant. Existing collections: {[c.name for c in collections.collections]}")
-        return client
-    except Exception as e:
-        raise VectorStoreError(f"Failed to initialize Qdrant client: {e}")
+    kept = np.empty_like(vectors)
+    kept_count = 0
+    keep_indices = []
+    for i, vector in enumerate(vectors):
+        if kept_count and float(np.max(kept[:kept_count] @ vector)) > threshold:
+            continue
+        kept[kept_count] = vector
+        kept_count += 1
+        keep_indices.append(i)
+    return keep_indices
 
-def create_or_recreate_collection(client: QdrantClient, collection_name: str, embeddings_size: int):
+def upload_chunks(
+    client: QdrantClient,
+    collection_name: str,
+    embedding_service: EmbeddingService,
+    chunks: List[Document]
+):
     """
-    Creates a new collection or re-creates it if it already exists,
-    ensuring it's configured for vector storage.
+    Embeds all chunks in one call, letting the model batch them at
+    config.embedding_batch_size, then uploads them with upload_collection.
+    Payloads use the page_content/metadata layout of the LangChain Qdrant wrapper.
     """
-    if client.collection_exists(collection_name=collection_name):
-        print(f"Collection '{collection_name}' already exists. Deleting and re-creating...")
-        client.delete_collection(collection_name=collection_name)
-    
-    client.create_collection(
+    # Similar-length chunks share a batch, so little of each batch is padding.
+    # Point IDs are random, so upload order does not matter.
+    chunks = sorted(chunks, key=lambda chunk: len(chunk.page_content))
+    vectors = embedding_service.cached_embeddings().embed_documents([chunk.page_content for chunk in chunks])
+    vectors = np.asarray(vectors, dtype=np.float32)
+
+    # Drop near-duplicate chunks (overlapping windows, paragraphs repeated across files).
+    # Walk longest first so the most complete version of repeated content is kept.
+    threshold = config.semantic_dedup_threshold
+    if threshold < 1.0:
+        order = np.arange(len(chunks))[::-1]
+        keep = sorted(order[i] for i in find_near_duplicates(vectors[order], threshold))
+        if len(keep) < len(chunks):
+            logger.info("Dropped %d near-duplicate chunks", len(chunks) - len(keep))
+            chunks = [chunks[i] for i in keep]
+            vectors = vectors[keep]
+
+    client.upload_collection(
         collection_name=collection_name,
-        vectors_config=models.VectorParams(size=embeddings_size, distance=models.Distance.COSINE),
+        vectors=vectors,
+        payload=({"page_content": chunk.page_content, "metadata": chunk.metadata} for chunk in chunks),
+        ids=[str(uuid.uuid4()) for _ in chunks],
+        batch_size=config.upload_batch_size,
+        # Parallel upload workers need a server; the embedded store is single-process
+        parallel=config.upload_parallel if config.qdrant_url else 1,
+        wait=True
     )
-    print(f"Collection '{collection_name}' created/re-created successfully.")
 
 def build_semantic_memory(
     source_directory: str = None,
@@ -118,8 +213,8 @@ def build_semantic_memory(
     """
     Main function to build the semantic memory:
     1. Loads documents from the specified directory.
-    2. Splits documents into chunks.
-    3. Initializes Qdrant and uploads chunks with embeddings.
+    2. Initializes the embedding model and Qdrant.
+    3. Splits documents into token-sized chunks and uploads them with embeddings.
     """
     print("\n--- Starting Semantic Memory Build Process ---")
     
@@ -132,35 +227,81 @@ def build_semantic_memory(
     if not raw_documents:
         raise DataLoadingError(f"No documents found in '{source_dir}'. Please ensure it contains .txt or .md files.")
 
-    # 2. Split documents into chunks
-    chunks = split_documents(raw_documents)
-
-    # 3. Initialize services
+    # 2. Initialize services
     embedding_service = initialize_embeddings()
     qdrant_client = initialize_qdrant_client()
 
+    # 3. Split documents into chunks sized in the embedding model's tokens
+    chunks = split_documents(raw_documents, embedding_service.tokenizer)
+
     # Get embedding size
     embeddings_size = embedding_service.get_embedding_size()
     print(f"Determined embedding size: {embeddings_size}")
 
-    create_or_recreate_collection(qdrant_client, collection, embeddings_size)
+    create_or_recreate_collection(qdrant_client, collection, embeddings_size, quantization=config.semantic_quantization_mode)
 
     try:
-        qdrant_vectorstore = Qdrant(
-            client=qdrant_client,
-            collection_name=collection,
-            embeddings=embedding_service._embeddings,
-        )
-        
         # Add chunks to Qdrant
         print(f"Adding {len(chunks)} chunks to Qdrant collection '{collection}'...")
-        qdrant_vectorstore.add_documents(chunks)
+        upload_chunks(qdrant_client, collection, embedding_service, chunks)
         print("Semantic Memory built successfully in Qdrant!")
         print(f"Total points in collection '{collection}': {qdrant_client.count(collection_name=collection).count}")
 
     except Exception as e:
         raise VectorStoreError(f"Failed to build semantic memory: {e}")
 
+def build_semantic_memory_incremental(
+    source_directory: str,
+    collection_name: str,
+    added: Set[str],
+    modified: Set[str],
+    deleted: Set[str],
+    embedding_service: Optional[EmbeddingService] = None
+):
+    """
+    Applies file-level changes to an existing semantic memory collection:
+    1. Deletes the chunks of added, modified and deleted files (matched on metadata.file_path);
+       added files are included so a stale build cache cannot duplicate their chunks.
+    2. Loads, splits and uploads only the added and modified files.
+    Falls back to a full build when the collection does not exist yet.
+    """
+    print("\n--- Starting Incremental Semantic Memory Build ---")
+
+    source_dir = source_directory or config.semantic_data_dir
+    collection = collection_name or config.semantic_memory_collection
+
+    qdrant_client = initialize_qdrant_client()
+    if not qdrant_client.collection_exists(collection_name=collection):
+        print(f"Collection '{collection}' does not exist yet. Running a full build.")
+        build_semantic_memory(source_dir, collection)
+        return
+
+    try:
+        stale = added | modified | deleted
+        if stale:
+            print(f"Removing existing chunks of {len(stale)} changed files...")
+            qdrant_client.delete(
+                collection_name=collection,
+                points_selector=models.FilterSelector(
+                    filter=models.Filter(must=[
+                        models.FieldCondition(key="metadata.file_path", match=models.MatchAny(any=sorted(stale)))
+                    ])
+                ),
+                wait=True
+            )
+
+        documents = load_documents_from_directory(source_dir, only_paths=added | modified)
+        if documents:
+            embedding_service = embedding_service or initialize_embeddings()
+            chunks = split_documents(documents, embedding_service.tokenizer)
+            print(f"Adding {len(chunks)} chunks from {len(documents)} files to '{collection}'...")
+            upload_chunks(qdrant_client, collection, embedding_service, chunks)
+
+        print(f"Total points in collection '{collection}': {qdrant_client.count(collection_name=collection).count}")
+
+    except Exception as e:
+        raise VectorStoreError(f"Failed to update semantic memory: {e}")
+
 # --- Main Execution ---
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(
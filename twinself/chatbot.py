@@ -1,14 +1,33 @@
 import os
-from typing import List, Dict, Any, Generator
+import asyncio
+import hashlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from itertools import islice
+from typing import List, Dict, Any, AsyncGenerator, Deque, Generator, Optional, Tuple
 
+import numpy as np
 from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
-from langchain_qdrant import Qdrant
-from qdrant_client import QdrantClient
+from langchain_core.documents import Document
+from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, SystemMessage
+from qdrant_client import models
 
 from .core.config import config
 from .core.exceptions import EmbeddingError
+from .core.qdrant_utils import get_qdrant_client, search_params
 from .services.embedding_service import EmbeddingService
+from .services.response_cache import ResponseCache
+
+@dataclass
+class _PreparedTurn:
+    """State of one chat turn up to the LLM call."""
+    cached_response: Optional[str] = None
+    messages: Optional[List[BaseMessage]] = None
+    retrieved_docs: Optional[Dict[str, List[str]]] = None
+    query_embedding: Optional[List[float]] = None
+    fingerprint: Optional[str] = None
+
 
 # --- Chatbot Class ---
 class DigitalTwinChatbot:
@@ -19,28 +38,23 @@ class DigitalTwinChatbot:
         # Initialize services
         self.embedding_service = EmbeddingService()
         self.llm = ChatGoogleGenerativeAI(model=config.chat_llm_model, temperature=0.7)
-        self.qdrant_client = QdrantClient(
-            path=config.qdrant_local_path,
-            prefer_grpc=False
-        )
-        # Initialize Vector Stores for each memory type
-        self.semantic_memory_store = Qdrant(
-            client=self.qdrant_client,
-            collection_name=config.semantic_memory_collection,
-            embeddings=self.embedding_service._embeddings,
-        )
-        self.episodic_memory_store = Qdrant(
-            client=self.qdrant_client,
-            collection_name=config.episodic_memory_collection,
-            embeddings=self.embedding_service._embeddings,
-        )
-        self.procedural_memory_store = Qdrant(
-            client=self.qdrant_client,
-            collection_name=config.procedural_memory_collection,
-            embeddings=self.embedding_service._embeddings,
-        )
+        self.qdrant_client = get_qdrant_client()
+        # Semantic and episodic searches overlap their round-trips against a remote server;
+        # the embedded local store is searched in-process, so there is nothing to overlap.
+        self._search_executor = ThreadPoolExecutor(max_workers=2) if config.qdrant_url else None
+        # Local mode always searches exactly and warns when given HNSW/quantization params
+        self._search_params = search_params() if config.qdrant_url else None
         
-        self.chat_history: List[Dict[str, str]] = [] # Store chat history in RAM
+        self.chat_history: Deque[Dict[str, str]] = deque(maxlen=10) # Store the last 5 turns in RAM
+        self._saved_turns = 0 # Turns recorded in chat_history so far
+        # (last query vector, semantic docs, episodic docs, _saved_turns at last use, reuse count)
+        # of the last search
+        self._last_retrieval: Optional[Tuple[np.ndarray, List[Document], List[Document], int, int]] = None
+        self.response_cache = ResponseCache(
+            threshold=config.response_cache_threshold,
+            max_entries=config.response_cache_size,
+            ttl_seconds=config.response_cache_ttl
+        ) if config.response_cache_enabled else None
 
         print("Chatbot initialized successfully. Ready to load memories.")
         self.procedural_rules = [] # Initialize here to prevent error before load
@@ -52,12 +66,17 @@ class DigitalTwinChatbot:
         These rules form the base of the System Prompt.
         """
         try:
+            # Only the rule text is needed; skip vectors and the rest of the payload
             points, _ = self.qdrant_client.scroll(
                 collection_name=config.procedural_memory_collection, 
                 limit=config.top_k_procedural, 
-                with_payload=True
+                with_payload=models.PayloadSelectorInclude(include=["page_content"]),
+                with_vectors=False
             )
-            self.procedural_rules = [point.payload['page_content'] for point in points if 'page_content' in point.payload]
+            self.procedural_rules = [
+                point.payload['page_content'] for point in points
+                if point.payload and 'page_content' in point.payload
+            ]
             
             if not self.procedural_rules:
                 print(f"Warning: Collection '{config.procedural_memory_collection}' exists but no procedural rules were loaded. Check content.")
@@ -67,7 +86,94 @@ class DigitalTwinChatbot:
             print(f"Error loading procedural rules: {e}. Ensure collection '{config.procedural_memory_collection}' exists and is populated.")
             self.procedural_rules = [] # Fallback to empty rules if error
 
-    def _construct_system_prompt(self, user_query: str, return_retrieved_docs: bool = False):
+        # Memories may have been rebuilt or rolled back; never reuse results from before
+        self._last_retrieval = None
+        self._build_prompt_parts()
+
+    def _search_memory(self, collection_name: str, query_embedding: List[float], k: int) -> List[Document]:
+        """Vector search in one memory collection, returning LangChain Documents."""
+        response = self.qdrant_client.query_points(
+            collection_name=collection_name,
+            query=query_embedding,
+            limit=k,
+            search_params=self._search_params,
+            with_payload=True
+        )
+        return [
+            Document(
+                page_content=point.payload.get("page_content", ""),
+                metadata=point.payload.get("metadata") or {}
+            )
+            for point in response.points
+        ]
+
+    def _retrieve_memories(self, query_embedding: List[float]) -> Tuple[List[Document], List[Document]]:
+        """Run the semantic and episodic searches for one query embedding."""
+        if self._search_executor is None:
+            return (
+                self._search_memory(config.semantic_memory_collection, query_embedding, config.top_k_semantic),
+                self._search_memory(config.episodic_memory_collection, query_embedding, config.top_k_episodic),
+            )
+
+        semantic = self._search_executor.submit(
+            self._search_memory, config.semantic_memory_collection, query_embedding, config.top_k_semantic
+        )
+        episodic = self._search_executor.submit(
+            self._search_memory, config.episodic_memory_collection, query_embedding, config.top_k_episodic
+        )
+        return semantic.result(), episodic.result()
+
+    def _retrieve_or_reuse(self, user_query: str, query_embedding: List[float]) -> Tuple[List[Document], List[Document]]:
+        """
+        Reuse the previous turn's retrieved memories instead of searching again when
+        the query is a near-repeat of the last searched one, or a short follow-up
+        ("yes", "go on") in the conversation that made that search.
+        Short follow-ups only count when the previous turn was saved to this chatbot's
+        own history, so shared instances serving many sessions never mix contexts.
+        Each reuse compares the next query against the latest one, and a search is
+        reused for at most config.retrieval_reuse_max_turns turns in a row, so a
+        chain of similar queries cannot keep serving the first query's results.
+        """
+        query_vector = np.asarray(query_embedding, dtype=np.float32)
+        last = self._last_retrieval
+        if last is not None:
+            last_vector, semantic, episodic, retrieved_at, reuses = last
+            is_followup = (
+                retrieved_at + 1 == self._saved_turns
+                and len(user_query.split()) < config.followup_max_words
+            )
+            if reuses < config.retrieval_reuse_max_turns and (
+                is_followup or float(np.dot(last_vector, query_vector)) > config.retrieval_reuse_threshold
+            ):
+                self._last_retrieval = (query_vector, semantic, episodic, self._saved_turns, reuses + 1)
+                return semantic, episodic
+
+        semantic, episodic = self._retrieve_memories(query_embedding)
+        self._last_retrieval = (query_vector, semantic, episodic, self._saved_turns, 0)
+        return semantic, episodic
+
+    def _history_fingerprint(self, context: str = "") -> str:
+        """
+        Fingerprint of the last two turns plus any extra context.
+        Cached responses are only reused when the conversation state matches.
+        """
+        hasher = hashlib.blake2b(digest_size=16)
+        for msg in islice(self.chat_history, max(len(self.chat_history) - 4, 0), None):
+            hasher.update(f"{msg['role']}\x00{msg['content']}\x00".encode("utf-8"))
+        hasher.update(context.encode("utf-8"))
+        return hasher.hexdigest()
+
+    def _save_turn(self, user_message: str, ai_response: str):
+        """Append a user/assistant exchange to the in-RAM chat history."""
+        self.chat_history.append({"role": "user", "content": user_message})
+        self.chat_history.append({"role": "assistant", "content": ai_response})
+        self._saved_turns += 1
+
+    def _build_prompt_parts(self):
+        """
+        Precompute the parts of the system prompt that only depend on the bot name
+        and the procedural rules, so each turn only formats the retrieved context.
+        """
         # 1. Procedural Memory (Core Persona & Behavior)
         procedural_instructions = "\n".join(self.procedural_rules)
         if not procedural_instructions:
@@ -78,53 +184,69 @@ class DigitalTwinChatbot:
             )
             print("Warning: No procedural rules loaded from DB. Using strong default instructions for persona.")
 
-        # Embed user query for similarity search
-        try:
-            query_embedding = self.embedding_service.embed_query(user_query)
-        except EmbeddingError as e:
-            print(f"Error embedding query: {e}")
-            # Return simplified prompt if embedding fails
-            return (
-                f"You are {self.bot_name}. Respond in the first person ('I'). "
-                f"--- Context for {self.bot_name} ---\n"
-                f"***Procedural Guidelines (How I should behave):***\n{procedural_instructions}\n"
-                f"I encountered an issue retrieving my memories. Please ask simpler questions for now."
-            )
+        persona_prefix = (
+            f"You are {self.bot_name}. You are not an AI assistant, but {self.bot_name}'s digital self. "
+            f"Respond in the first person ('I', 'me', 'my').\n"
+            f"Your persona, tone, and interaction style should exactly match {self.bot_name}'s unique personality.\n"
+            f"Utilize all provided context to inform your answers and communication style.\n"
+            f"If information is not available, state that politely in the first person, e.g.,"
+            f"--- Context for {self.bot_name} ---\n"
+            f"***Procedural Guidelines (How I should behave):***\n{procedural_instructions}\n"
+        )
+        # Identical leading message every turn, so providers with prompt caching can reuse it
+        self._static_system_message = SystemMessage(content=persona_prefix)
+        self._fallback_system_message = SystemMessage(content=(
+            f"You are {self.bot_name}. Respond in the first person ('I'). "
+            f"--- Context for {self.bot_name} ---\n"
+            f"***Procedural Guidelines (How I should behave):***\n{procedural_instructions}\n"
+            f"I encountered an issue retrieving my memories. Please ask simpler questions for now."
+        ))
+        self._semantic_header = f"\n\n***{self.bot_name}'s Knowledge Base (Relevant Facts):***\n"
+        self._episodic_header = f"\n\n***{self.bot_name}'s Conversation Style (Examples):***\n"
 
+    def _construct_system_messages(
+        self,
+        user_query: str,
+        query_embedding: Optional[List[float]],
+        return_retrieved_docs: bool = False
+    ):
+        """
+        Build the system messages for one turn from the three memory types:
+        the cached persona/procedural message followed by a message carrying
+        this turn's retrieved context. The LLM client merges them into one
+        system instruction.
+        query_embedding is the embedding of user_query computed once in chat();
+        None means embedding failed and a simplified prompt is returned.
+        """
+        if query_embedding is None:
+            # Return simplified prompt if embedding failed
+            messages = [self._fallback_system_message]
+            if return_retrieved_docs:
+                return messages, {"semantic": [], "episodic": [], "procedural": self.procedural_rules}
+            return messages
+
+        semantic_facts, episodic_examples_docs = self._retrieve_or_reuse(user_query, query_embedding)
 
         # 2. Semantic Memory (Factual Knowledge)
-        semantic_facts = self.semantic_memory_store.similarity_search_by_vector(query_embedding, k=config.top_k_semantic)
         semantic_context = "\n".join([doc.page_content for doc in semantic_facts])
-        if semantic_context:
-            semantic_context = f"\n\n***{self.bot_name}'s Knowledge Base (Relevant Facts):***\n{semantic_context}"
-        else:
-            semantic_context = f"\n\n***{self.bot_name}'s Knowledge Base (Relevant Facts):***\n(No specific facts retrieved for this query.)"
+        if not semantic_context:
+            semantic_context = "(No specific facts retrieved for this query.)"
         
         # 3. Episodic Memory (Style and Tone Examples)
-        episodic_examples_docs = self.episodic_memory_store.similarity_search_by_vector(query_embedding, k=config.top_k_episodic)
         episodic_examples_text = "\n\n".join([
             f"--- Example Interaction ---\nUser: {doc.metadata.get('original_user_query', 'N/A')}\n{self.bot_name}: {doc.page_content}"
             for doc in episodic_examples_docs
         ])
-        if episodic_examples_text:
-            episodic_context = f"\n\n***{self.bot_name}'s Conversation Style (Examples):***\n{episodic_examples_text}"
-        else:
-            episodic_context = f"\n\n***{self.bot_name}'s Conversation Style (Examples):***\n(No specific style examples retrieved for this query.)"
-
+        if not episodic_examples_text:
+            episodic_examples_text = "(No specific style examples retrieved for this query.)"
 
-        # Combine all parts into the final system prompt
-        system_prompt_content = (
-            f"You are {self.bot_name}. You are not an AI assistant, but {self.bot_name}'s digital self. "
-            f"Respond in the first person ('I', 'me', 'my').\n"
-            f"Your persona, tone, and interaction style should exactly match {self.bot_name}'s unique personality.\n"
-            f"Utilize all provided context to inform your answers and communication style.\n"
-            f"If information is not available, state that politely in the first person, e.g.,"
-            f"--- Context for {self.bot_name} ---\n"
-            f"***Procedural Guidelines (How I should behave):***\n{procedural_instructions}\n"
-            f"{semantic_context}\n"
-            f"{episodic_context}\n"
-            f"--- End Context ---"
-        )
+        # Only this turn's context is formatted; the persona message is reused as-is
+        context_message = SystemMessage(content="".join([
+            self._semantic_header, semantic_context, "\n",
+            self._episodic_header, episodic_examples_text, "\n",
+            "--- End Context ---"
+        ]))
+        messages = [self._static_system_message, context_message]
         
         if return_retrieved_docs:
             retrieved_docs = {
@@ -132,9 +254,72 @@ class DigitalTwinChatbot:
                 "episodic": [doc.page_content for doc in episodic_examples_docs],
                 "procedural": self.procedural_rules
             }
-            return system_prompt_content, retrieved_docs
+            return messages, retrieved_docs
+        
+        return messages
+
+    def _prepare_turn(self, user_message: str, context: str = "", return_retrieved_context: bool = False) -> _PreparedTurn:
+        """
+        Everything before the LLM call: embed the message, probe the response cache,
+        retrieve memories and assemble the LLM messages.
+        """
+        # Embed the user message once; shared by the cache probe and memory retrieval
+        try:
+            query_embedding = self.embedding_service.embed_query(user_message)
+        except EmbeddingError as e:
+            print(f"Error embedding query: {e}")
+            query_embedding = None
+
+        # Serve near-duplicate questions from the response cache
+        fingerprint = None
+        if self.response_cache is not None and query_embedding is not None and not return_retrieved_context:
+            fingerprint = self._history_fingerprint(context)
+            cached_response = self.response_cache.lookup(query_embedding, fingerprint)
+            if cached_response is not None:
+                return _PreparedTurn(cached_response=cached_response)
+
+        # Construct system messages: static persona plus this turn's retrieved context
+        if return_retrieved_context:
+            messages, retrieved_docs = self._construct_system_messages(
+                user_message, query_embedding, return_retrieved_docs=True
+            )
+        else:
+            messages = self._construct_system_messages(user_message, query_embedding)
+            retrieved_docs = None
+        
+        full_context = f"User's prompt: {user_message}\n\n Context: \n{context}" if context else user_message
+        
+        # Add historical messages (excluding the system prompt)
+        for msg in self.chat_history:
+            if msg['role'] == 'user':
+                messages.append(HumanMessage(content=msg['content']))
+            elif msg['role'] == 'assistant':
+                messages.append(AIMessage(content=msg['content']))
         
-        return system_prompt_content
+        messages.append(HumanMessage(content=full_context))
+
+        return _PreparedTurn(
+            messages=messages,
+            retrieved_docs=retrieved_docs,
+            query_embedding=query_embedding,
+            fingerprint=fingerprint
+        )
+
+    def _finish_turn(self, turn: _PreparedTurn, user_message: str, ai_response: str, save_history: bool):
+        """Cache a fresh LLM response and record the exchange in history."""
+        if turn.fingerprint is not None:
+            self.response_cache.add(turn.query_embedding, turn.fingerprint, ai_response)
+
+        if save_history:
+            self._save_turn(user_message, ai_response)
+
+    @staticmethod
+    def _error_message(e: Exception) -> str:
+        """User-facing message for a failed chat turn."""
+        print(f"An unexpected error occurred in chat function: {e}")
+        if "ResourceExhausted" in str(e):
+            return "Sorry, it seems I'm busy right now. Please try again in a few minutes!"
+        return "Sorry, I can't reply at the moment. There seems to be a technical problem. Please try again later."
 
     def chat(self, user_message: str, context: str = "", stream: bool = False, save_history: bool = True, return_retrieved_context: bool = False):
         """
@@ -154,80 +339,82 @@ class DigitalTwinChatbot:
             dict if stream=False and return_retrieved_context=True
         """
         try:
-            # Construct dynamic system prompt
-            if return_retrieved_context:
-                system_prompt_content, retrieved_docs = self._construct_system_prompt(user_message, return_retrieved_docs=True)
-            else:
-                system_prompt_content = self._construct_system_prompt(user_message)
-                retrieved_docs = None
-            
-            full_context = f"User's prompt: {user_message}\n\n Context: \n{context}" if context else user_message
-            
-            # Prepare messages for LLM
-            messages = [SystemMessage(content=system_prompt_content)]
-            
-            # Add historical messages (excluding the system prompt)
-            for msg in self.chat_history:
-                if msg['role'] == 'user':
-                    messages.append(HumanMessage(content=msg['content']))
-                elif msg['role'] == 'assistant':
-                    messages.append(AIMessage(content=msg['content']))
-            
-            messages.append(HumanMessage(content=full_context))
+            turn = self._prepare_turn(user_message, context, return_retrieved_context)
+
+            if turn.cached_response is not None:
+                if save_history:
+                    self._save_turn(user_message, turn.cached_response)
+                return self._single_chunk_generator(turn.cached_response) if stream else turn.cached_response
 
             if stream:
                 # Streaming mode - return generator (cannot return context in streaming)
                 if return_retrieved_context:
                     print("Warning: return_retrieved_context is ignored in streaming mode")
-                return self._chat_stream(messages, user_message, save_history)
+                return self._chat_stream(turn, user_message, save_history)
             else:
                 # Normal mode - return string or dict
-                ai_response_message = self.llm.invoke(messages)
+                ai_response_message = self.llm.invoke(turn.messages)
                 ai_response = ai_response_message.content
 
-                if save_history:
-                    self.chat_history.append({"role": "user", "content": user_message})
-                    self.chat_history.append({"role": "assistant", "content": ai_response})
-                    
-                    if len(self.chat_history) > 10:
-                        self.chat_history = self.chat_history[-10:]
+                self._finish_turn(turn, user_message, ai_response, save_history)
                 
                 if return_retrieved_context:
                     return {
                         "response": ai_response,
-                        "retrieved_docs": retrieved_docs
+                        "retrieved_docs": turn.retrieved_docs
                     }
                             
                 return ai_response
 
         except Exception as e:
-            print(f"An unexpected error occurred in chat function: {e}")
-            if "ResourceExhausted" in str(e):
-                error_msg = "Sorry, it seems I'm busy right now. Please try again in a few minutes!"
-            else:
-                error_msg = "Sorry, I can't reply at the moment. There seems to be a technical problem. Please try again later."
-            
+            error_msg = self._error_message(e)
             if stream:
                 return self._error_generator(error_msg)
             else:
                 return error_msg
+
+    async def astream(self, user_message: str, context: str = "", save_history: bool = True) -> AsyncGenerator[str, None]:
+        """
+        Async streaming chat for use inside an event loop.
+        Embedding and retrieval run on a worker thread and the LLM is streamed with
+        astream, so concurrent sessions overlap their round-trips instead of
+        blocking the loop.
+        """
+        try:
+            turn = await asyncio.to_thread(self._prepare_turn, user_message, context)
+        except Exception as e:
+            yield self._error_message(e)
+            return
+
+        if turn.cached_response is not None:
+            if save_history:
+                self._save_turn(user_message, turn.cached_response)
+            yield turn.cached_response
+            return
+
+        ai_response = ""
+        try:
+            async for chunk in self.llm.astream(turn.messages):
+                if hasattr(chunk, "content") and chunk.content:
+                    piece = chunk.content
+                    ai_response += piece
+                    yield piece
+
+            self._finish_turn(turn, user_message, ai_response, save_history)
+        except Exception as e:
+            yield f"\n[Streaming Error] {e}"
     
-    def _chat_stream(self, messages, user_message: str, save_history: bool):
+    def _chat_stream(self, turn: _PreparedTurn, user_message: str, save_history: bool):
         """Generator for streaming chat responses."""
         ai_response = ""
         try:
-            for chunk in self.llm.stream(messages):
+            for chunk in self.llm.stream(turn.messages):
                 if hasattr(chunk, "content") and chunk.content:
                     piece = chunk.content
                     ai_response += piece
                     yield piece
             
-            if save_history:
-                self.chat_history.append({"role": "user", "content": user_message})
-                self.chat_history.append({"role": "assistant", "content": ai_response})
-                
-                if len(self.chat_history) > 10:
-                    self.chat_history = self.chat_history[-10:]
+            self._finish_turn(turn, user_message, ai_response, save_history)
         except Exception as e:
             yield f"\n[Streaming Error] {e}"
     
@@ -235,6 +422,10 @@ class DigitalTwinChatbot:
         """Generator that yields error message."""
         yield error_msg
 
+    def _single_chunk_generator(self, response: str):
+        """Generator that yields a complete (cached) response as one chunk."""
+        yield response
+
 
 
 # --- Main Execution Loop for Chatbot ---
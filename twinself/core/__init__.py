@@ -1,6 +1,6 @@
 """
 Core module for TwinSelf.
-Contains configuration, exceptions, version management, and incremental building.
+Contains configuration, exceptions, version management, incremental building and Qdrant helpers.
 """
 
 from .config import config, Config
@@ -15,6 +15,14 @@ from .exceptions import (
 )
 from .version_manager import VersionManager, MemoryVersion
 from .incremental_builder import IncrementalBuilder
+from .qdrant_utils import (
+    create_qdrant_client,
+    get_qdrant_client,
+    get_vector_store,
+    initialize_qdrant_client,
+    create_or_recreate_collection,
+    rows_to_documents
+)
 
 __all__ = [
     "config",
@@ -28,5 +36,11 @@ __all__ = [
     "DataLoadingError",
     "VersionManager",
     "MemoryVersion",
-    "IncrementalBuilder"
+    "IncrementalBuilder",
+    "create_qdrant_client",
+    "get_qdrant_client",
+    "get_vector_store",
+    "initialize_qdrant_client",
+    "create_or_recreate_collection",
+    "rows_to_documents"
 ]
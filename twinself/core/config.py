@@ -1,4 +1,5 @@
 import os
+from functools import cached_property
 from typing import Optional
 from dotenv import load_dotenv
 
@@ -6,6 +7,11 @@ load_dotenv()
 
 
 class Config:
+    """
+    Process-wide settings read from the environment.
+    Each value is looked up once on first access and then cached on the instance,
+    so hot paths reading config pay a plain attribute lookup.
+    """
     _instance: Optional['Config'] = None
     
     def __new__(cls) -> 'Config':
@@ -20,91 +26,213 @@ class Config:
         self._validate_environment()
     
     # API Keys
-    @property
+    @cached_property
     def google_api_key(self) -> str:
         return self._get_required_env("GOOGLE_API_KEY")
     
-    @property
+    @cached_property
     def qdrant_local_path(self) -> str:
         return os.getenv("QDRANT_LOCAL_PATH", "./data/qdrant/twinself")
     
+    @cached_property
+    def qdrant_url(self) -> Optional[str]:
+        return os.getenv("QDRANT_URL") or None
+    
+    @cached_property
+    def qdrant_grpc_port(self) -> int:
+        return int(os.getenv("QDRANT_GRPC_PORT", "6334"))
+    
     # Model Configuration
-    @property
+    @cached_property
     def chat_llm_model(self) -> str:
         return os.getenv("CHAT_LLM_MODEL", "gemini-2.5-flash-lite")
     
-    @property
+    @cached_property
     def embedding_model_name(self) -> str:
         return os.getenv("EMBEDDING_MODEL_NAME", "dangvantuan/vietnamese-document-embedding")
     
-    @property
+    @cached_property
     def model_cache_folder(self) -> str:
         return os.getenv("MODEL_CACHE_FOLDER", "./models")
     
+    @cached_property
+    def embedding_backend(self) -> str:
+        return os.getenv("EMBEDDING_BACKEND", "torch")
+    
     # Collection Names - configurable with user prefix
-    @property
+    @cached_property
     def user_prefix(self) -> str:
         return os.getenv("USER_PREFIX", "user")
     
-    @property
+    @cached_property
     def semantic_memory_collection(self) -> str:
         return f"{self.user_prefix}_semantic_memory_hg"
     
-    @property
+    @cached_property
     def episodic_memory_collection(self) -> str:
         return f"{self.user_prefix}_episodic_memory_hg"
     
-    @property
+    @cached_property
     def procedural_memory_collection(self) -> str:
         return f"{self.user_prefix}_procedural_memory_hg"
     
     # Retrieval Settings
-    @property
+    @cached_property
     def top_k_semantic(self) -> int:
         return 7
     
-    @property
+    @cached_property
     def top_k_episodic(self) -> int:
         return 5
 
-    @property
+    @cached_property
     def top_k_procedural(self) -> int:
         return 10
     
+    # Response Cache
+    @cached_property
+    def response_cache_enabled(self) -> bool:
+        return os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+    
+    @cached_property
+    def response_cache_threshold(self) -> float:
+        return float(os.getenv("RESPONSE_CACHE_THRESHOLD", "0.85"))
+    
+    @cached_property
+    def response_cache_ttl(self) -> int:
+        return int(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+    
+    @cached_property
+    def response_cache_size(self) -> int:
+        return 256
+    
+    @cached_property
+    def retrieval_reuse_threshold(self) -> float:
+        return float(os.getenv("RETRIEVAL_REUSE_THRESHOLD", "0.9"))
+    
+    @cached_property
+    def retrieval_reuse_max_turns(self) -> int:
+        return int(os.getenv("RETRIEVAL_REUSE_MAX_TURNS", "3"))
+    
+    @cached_property
+    def followup_max_words(self) -> int:
+        return int(os.getenv("FOLLOWUP_MAX_WORDS", "3"))
+    
     # Directory Paths
-    @property
+    @cached_property
     def semantic_data_dir(self) -> str:
         return "semantic_data"
     
-    @property
+    @cached_property
     def episodic_data_dir(self) -> str:
         return "episodic_data"
     
-    @property
+    @cached_property
     def procedural_data_dir(self) -> str:
         return "procedural_data"
     
-    @property
+    @cached_property
     def system_prompts_dir(self) -> str:
         return "system_prompts"
     
+    @cached_property
+    def prompt_cache_size(self) -> int:
+        return int(os.getenv("PROMPT_CACHE_SIZE", "32"))
+    
+    @cached_property
+    def prompts_live_reload(self) -> bool:
+        return os.getenv("PROMPTS_LIVE_RELOAD", "false").lower() in ("1", "true", "yes")
+    
+    @cached_property
+    def cache_dir(self) -> str:
+        return os.getenv("CACHE_DIR", "./data/cache")
+    
+    @cached_property
+    def change_hash_algo(self) -> str:
+        """hashlib algorithm used to detect changed data files (not a security boundary)."""
+        return os.getenv("CHANGE_HASH_ALGO", "blake2b")
+    
     # Text Processing
-    @property
+    @cached_property
     def chunk_size(self) -> int:
         return 1000
     
-    @property
+    @cached_property
     def chunk_overlap(self) -> int:
         return 200
     
-    @property
+    @cached_property
+    def chunk_size_tokens(self) -> int:
+        return int(os.getenv("CHUNK_SIZE_TOKENS", "256"))
+    
+    @cached_property
+    def chunk_overlap_tokens(self) -> int:
+        return int(os.getenv("CHUNK_OVERLAP_TOKENS", "48"))
+    
+    @cached_property
+    def semantic_dedup_threshold(self) -> float:
+        return float(os.getenv("SEMANTIC_DEDUP_THRESHOLD", "0.95"))
+    
+    @cached_property
     def batch_size(self) -> int:
         return 5
     
-    @property
+    @cached_property
+    def embedding_batch_size(self) -> int:
+        return int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+    
+    @cached_property
+    def batch_token_budget(self) -> int:
+        return int(os.getenv("EMBEDDING_BATCH_TOKENS", "16384"))
+    
+    @cached_property
+    def upload_batch_size(self) -> int:
+        return int(os.getenv("UPLOAD_BATCH_SIZE", "256"))
+    
+    @cached_property
+    def upload_parallel(self) -> int:
+        return int(os.getenv("UPLOAD_PARALLEL", "4"))
+    
+    @cached_property
     def qdrant_timeout(self) -> int:
         return 60
     
+    @cached_property
+    def enable_quantization(self) -> bool:
+        return os.getenv("ENABLE_QUANTIZATION", "false").lower() in ("1", "true", "yes")
+    
+    @cached_property
+    def quantization_mode(self) -> Optional[str]:
+        """Quantization mode for the episodic and procedural collections."""
+        return "scalar" if self.enable_quantization else None
+    
+    @cached_property
+    def embedding_dtype(self) -> str:
+        """Precision of the vectors stored in Qdrant: float32 or float16."""
+        return os.getenv("EMBEDDING_DTYPE", "float32").lower()
+    
+    @cached_property
+    def semantic_quantization_mode(self) -> Optional[str]:
+        """Quantization mode for the semantic collection: binary, scalar or none."""
+        mode = os.getenv("SEMANTIC_QUANTIZATION", "binary").lower()
+        return None if mode == "none" else mode
+    
+    @cached_property
+    def hnsw_m(self) -> int:
+        return int(os.getenv("HNSW_M", "16"))
+    
+    @cached_property
+    def hnsw_ef_construct(self) -> int:
+        return int(os.getenv("HNSW_EF_CONSTRUCT", "128"))
+    
+    @cached_property
+    def hnsw_ef(self) -> int:
+        return int(os.getenv("HNSW_EF", "64"))
+    
+    @cached_property
+    def quantization_oversampling(self) -> float:
+        return float(os.getenv("QUANTIZATION_OVERSAMPLING", "2.0"))
+    
     def _get_required_env(self, key: str) -> str:
         """Get required environment variable or raise error."""
         value = os.getenv(key)
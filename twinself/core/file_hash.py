@@ -0,0 +1,37 @@
+"""
+File content hashing shared by change detection and the snapshot store.
+"""
+import hashlib
+import mmap
+import os
+
+_HASH_CHUNK_SIZE = 1 << 20
+# Below this size the mmap setup costs more than the buffered copy it saves
+_MMAP_THRESHOLD_BYTES = 1 << 20
+
+
+def new_hasher(algorithm: str):
+    """hashlib object for an algorithm name; blake2b uses a 128-bit digest."""
+    if algorithm == "blake2b":
+        return hashlib.blake2b(digest_size=16)
+    return hashlib.new(algorithm)
+
+
+def compute_file_hash(filepath: str, algorithm: str = "sha256") -> str:
+    """Hash file content without loading the whole file into memory."""
+    with open(filepath, 'rb') as f:
+        if os.fstat(f.fileno()).st_size >= _MMAP_THRESHOLD_BYTES:
+            # Large files: hash straight from the page cache, no userspace copy
+            hasher = new_hasher(algorithm)
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                hasher.update(mapped)
+            return hasher.hexdigest()
+
+        if hasattr(hashlib, "file_digest"):
+            return hashlib.file_digest(f, lambda: new_hasher(algorithm)).hexdigest()
+
+        # Python < 3.11: stream in 1 MiB chunks
+        hasher = new_hasher(algorithm)
+        while chunk := f.read(_HASH_CHUNK_SIZE):
+            hasher.update(chunk)
+        return hasher.hexdigest()
@@ -0,0 +1,20 @@
+"""
+Crash-safe file writes for the build cache, version registry and snapshot manifests.
+"""
+import os
+from pathlib import Path
+
+
+def atomic_write_bytes(path: Path, data: bytes):
+    """
+    Replace path with data atomically: the bytes go to a sibling temporary file
+    that is then renamed over the target, so readers never see a partial file.
+    """
+    path = Path(path)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
@@ -1,54 +1,172 @@
 import os
 import hashlib
-import json
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Set, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
 from datetime import datetime
 
+import orjson
+
 from langchain_core.documents import Document
 from qdrant_client import QdrantClient, models
 
 from .config import config
 from .exceptions import DataLoadingError, VectorStoreError
+from .file_hash import compute_file_hash
+from .file_io import atomic_write_bytes
 from ..services.embedding_service import EmbeddingService
 
+_TRACKED_SUFFIXES = ('.txt', '.md', '.json')
+
+# Cache entry per tracked file: {"hash": ..., "mtime_ns": ..., "size": ...}, plus
+# "algo" when the hash was made with another algorithm than the current one
+FileEntry = Dict[str, Any]
+
+# Caches written before the algorithm was recorded: hex digest length -> algorithm
+_UNLABELED_DIGEST_ALGOS = {64: "sha256", 32: "blake2b"}
+
 
 class IncrementalBuilder:
     """Smart builder that only processes changed files."""
     
     def __init__(self, cache_path: str = "./data/build_cache.json"):
+        # Change-detection fingerprint only; version data hashes always use SHA-256
+        self.hash_algo = config.change_hash_algo or "blake2b"
         self.cache_path = Path(cache_path)
         self.cache_path.parent.mkdir(parents=True, exist_ok=True)
-        self.cache: Dict[str, Dict[str, str]] = self._load_cache()
+        self.cache: Dict[str, Dict[str, FileEntry]] = self._load_cache()
         self.embedding_service = EmbeddingService()
+        # Entries from the last detect_changes per directory, consumed by update_cache
+        self._last_scan: Dict[str, Dict[str, FileEntry]] = {}
     
-    def _load_cache(self) -> Dict[str, Dict[str, str]]:
-        """Load file hash cache."""
-        if self.cache_path.exists():
-            with open(self.cache_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return {}
+    def _load_cache(self) -> Dict[str, Dict[str, FileEntry]]:
+        """
+        Load file hash cache.
+        The cache records the algorithm its hashes were made with. Older caches did
+        not, so the algorithm is inferred from the digest length; the oldest stored
+        bare hashes, which become entries without stat fields. Entries hashed with
+        another algorithm than the current one are tagged with theirs, so the next
+        scan re-hashes the file with it and compares content, not digests.
+        """
+        if not self.cache_path.exists():
+            return {}
+        raw = orjson.loads(self.cache_path.read_bytes())
+        if isinstance(raw.get("hash_algo"), str):
+            stored_algo, files_by_type = raw["hash_algo"], raw.get("files", {})
+        else:
+            stored_algo, files_by_type = None, raw
+        
+        cache: Dict[str, Dict[str, FileEntry]] = {}
+        for data_type, files in files_by_type.items():
+            entries = cache[data_type] = {}
+            for path, entry in files.items():
+                if not isinstance(entry, dict):
+                    entry = {"hash": entry}
+                algo = (
+                    entry.get("algo") or stored_algo
+                    or _UNLABELED_DIGEST_ALGOS.get(len(entry["hash"]), self.hash_algo)
+                )
+                entry.pop("algo", None)
+                if algo != self.hash_algo:
+                    entry["algo"] = algo
+                entries[path] = entry
+        return cache
     
     def _save_cache(self):
-        """Save file hash cache."""
-        with open(self.cache_path, 'w', encoding='utf-8') as f:
-            json.dump(self.cache, f, indent=2)
+        """Save file hash cache with the algorithm of its (untagged) hashes."""
+        cache = {"hash_algo": self.hash_algo, "files": self.cache}
+        atomic_write_bytes(self.cache_path, orjson.dumps(cache, option=orjson.OPT_INDENT_2))
     
-    def _compute_file_hash(self, filepath: str) -> str:
-        """Compute SHA256 hash of file content."""
-        hasher = hashlib.sha256()
-        with open(filepath, 'rb') as f:
-            hasher.update(f.read())
-        return hasher.hexdigest()
+    def _compute_file_hash(self, filepath: str, algorithm: Optional[str] = None) -> str:
+        """
+        Hash file content without loading the whole file into memory.
+        Uses the change-detection algorithm unless another one is given.
+        """
+        return compute_file_hash(filepath, algorithm or self.hash_algo)
+    
+    def _iter_data_files(self, directory: str) -> Iterator[Tuple[str, os.stat_result]]:
+        """
+        Yield (path, stat) for every tracked data file under directory, recursively.
+        Files come sorted by name within each folder, before its subfolders.
+        DirEntry reuses the type and stat data from the directory listing.
+        A missing directory yields nothing, as os.walk did.
+        """
+        try:
+            with os.scandir(directory) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except (FileNotFoundError, NotADirectoryError):
+            return
+        subdirs = []
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(entry.path)
+            elif entry.name.endswith(_TRACKED_SUFFIXES) and entry.is_file():
+                yield entry.path, entry.stat()
+        for subdir in subdirs:
+            yield from self._iter_data_files(subdir)
+    
+    def _hash_files(self, paths: List[str], algorithm: Optional[str] = None) -> Dict[str, str]:
+        """
+        Hash many files concurrently, returning {path: hash}.
+        hashlib releases the GIL on large updates, so files hash in parallel; the
+        pool lives only for the call, so no threads outlive the builder.
+        """
+        if not paths:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(len(paths), os.cpu_count() or 1)) as executor:
+            return dict(zip(paths, executor.map(lambda path: self._compute_file_hash(path, algorithm), paths)))
+    
+    def _scan(
+        self, directory: str, data_type: str, memo: Optional[Dict[str, FileEntry]] = None
+    ) -> Dict[str, FileEntry]:
+        """
+        Current {path: entry} for a directory. Files whose mtime and size match their
+        entry in memo (the cache by default) keep that hash without being read;
+        only the rest are hashed. Memo entries made with another algorithm are
+        migrated in place when the file content still matches them.
+        """
+        cached_files = self.cache.get(data_type, {}) if memo is None else memo
+        entries: Dict[str, FileEntry] = {}
+        to_hash = []
+        to_migrate = []
+        for path, stat in self._iter_data_files(directory):
+            cached = cached_files.get(path)
+            if (
+                cached and "algo" not in cached
+                and cached.get("mtime_ns") == stat.st_mtime_ns and cached.get("size") == stat.st_size
+            ):
+                entries[path] = cached
+            else:
+                entries[path] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+                to_hash.append(path)
+                if cached and "algo" in cached:
+                    to_migrate.append(path)
+
+        for path, file_hash in self._hash_files(to_hash).items():
+            entries[path]["hash"] = file_hash
+        self._migrate_entries(cached_files, {path: entries[path] for path in to_migrate})
+        return entries
+    
+    def _migrate_entries(self, cached_files: Dict[str, FileEntry], current: Dict[str, FileEntry]):
+        """
+        Replace entries hashed with another algorithm by their current entry when
+        re-hashing the file with the old algorithm still gives the cached hash,
+        so unchanged files are not reported as modified after an algorithm change.
+        """
+        by_algo: Dict[str, List[str]] = {}
+        for path in current:
+            by_algo.setdefault(cached_files[path]["algo"], []).append(path)
+        for algo, paths in by_algo.items():
+            for path, old_hash in self._hash_files(paths, algo).items():
+                if old_hash == cached_files[path]["hash"]:
+                    cached_files[path] = current[path]
     
     def _compute_directory_hash(self, directory: str) -> str:
-        """Compute combined hash of all files in directory."""
+        """Compute combined SHA256 hash of all files in directory (recorded as version data hashes)."""
         hasher = hashlib.sha256()
-        for root, _, files in os.walk(directory):
-            for file in sorted(files):
-                if file.endswith(('.txt', '.md', '.json')):
-                    filepath = os.path.join(root, file)
-                    hasher.update(self._compute_file_hash(filepath).encode())
+        paths = [path for path, _ in self._iter_data_files(directory)]
+        for file_hash in self._hash_files(paths, "sha256").values():
+            hasher.update(file_hash.encode())
         return hasher.hexdigest()
     
     def detect_changes(self, directory: str, data_type: str) -> Tuple[Set[str], Set[str], Set[str]]:
@@ -61,12 +179,8 @@ class IncrementalBuilder:
         if not os.path.exists(directory):
             return set(), set(), set()
         
-        current_files = {}
-        for root, _, files in os.walk(directory):
-            for file in files:
-                if file.endswith(('.txt', '.md', '.json')):
-                    filepath = os.path.join(root, file)
-                    current_files[filepath] = self._compute_file_hash(filepath)
+        current_files = self._scan(directory, data_type)
+        self._last_scan[directory] = current_files
         
         cached_files = self.cache.get(data_type, {})
         
@@ -74,27 +188,62 @@ class IncrementalBuilder:
         deleted = set(cached_files.keys()) - set(current_files.keys())
         modified = {
             f for f in current_files.keys() & cached_files.keys()
-            if current_files[f] != cached_files[f]
+            if current_files[f]["hash"] != cached_files[f]["hash"]
         }
         
         return added, modified, deleted
     
     def update_cache(self, directory: str, data_type: str):
-        """Update cache with current file hashes."""
-        current_files = {}
-        for root, _, files in os.walk(directory):
-            for file in files:
-                if file.endswith(('.txt', '.md', '.json')):
-                    filepath = os.path.join(root, file)
-                    current_files[filepath] = self._compute_file_hash(filepath)
+        """
+        Update cache with current file hashes.
+        The directory is scanned again, so files written since detect_changes (such
+        as generated rules) are recorded; entries from that earlier scan are reused
+        for files whose mtime and size are unchanged.
+        """
+        memo = {**self.cache.get(data_type, {}), **self._last_scan.pop(directory, {})}
+        current_files = self._scan(directory, data_type, memo)
         
         self.cache[data_type] = current_files
         self._save_cache()
     
+    def _any_change(self, directory: str, data_type: str) -> bool:
+        """
+        Whether any file was added, modified or deleted since the cache was written.
+        Walks the directory lazily and stops at the first change; a file is only
+        hashed when its mtime or size differs from the cached entry. Files found
+        unchanged that way get their entry refreshed (and migrated to the current
+        algorithm), so they are not hashed again on the next check.
+        """
+        if not os.path.exists(directory):
+            return False
+        
+        cached_files = self.cache.get(data_type, {})
+        seen = set()
+        refreshed = False
+        try:
+            for path, stat in self._iter_data_files(directory):
+                cached = cached_files.get(path)
+                if cached is None:
+                    return True
+                seen.add(path)
+                if (
+                    "algo" not in cached
+                    and cached.get("mtime_ns") == stat.st_mtime_ns and cached.get("size") == stat.st_size
+                ):
+                    continue
+                if self._compute_file_hash(path, cached.get("algo")) != cached["hash"]:
+                    return True
+                file_hash = self._compute_file_hash(path) if "algo" in cached else cached["hash"]
+                cached_files[path] = {"hash": file_hash, "mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+                refreshed = True
+            return len(seen) != len(cached_files)
+        finally:
+            if refreshed:
+                self._save_cache()
+    
     def needs_rebuild(self, directory: str, data_type: str) -> bool:
         """Check if directory needs rebuild."""
-        added, modified, deleted = self.detect_changes(directory, data_type)
-        return bool(added or modified or deleted)
+        return self._any_change(directory, data_type)
     
     def get_change_summary(self, directory: str, data_type: str) -> Dict[str, int]:
         """Get summary of changes."""
@@ -132,8 +281,16 @@ class IncrementalBuilder:
         print(f"  Modified: {len(modified)} files")
         print(f"  Deleted: {len(deleted)} files")
         
-        from ..build_semantic_memory import build_semantic_memory
-        build_semantic_memory(source_dir, collection)
+        if force_rebuild:
+            from ..build_semantic_memory import build_semantic_memory
+            build_semantic_memory(source_dir, collection)
+        else:
+            # Only re-embed changed files; chunks of unchanged files stay in place
+            from ..build_semantic_memory import build_semantic_memory_incremental
+            build_semantic_memory_incremental(
+                source_dir, collection, added, modified, deleted,
+                embedding_service=self.embedding_service
+            )
         
         # Update cache
         self.update_cache(source_dir, 'semantic')
@@ -0,0 +1,173 @@
+"""
+Shared Qdrant helpers used by the memory builders.
+"""
+import datetime
+import functools
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_qdrant import Qdrant
+from qdrant_client import QdrantClient, models
+
+from .config import config
+from .exceptions import VectorStoreError
+
+
+def create_qdrant_client() -> QdrantClient:
+    """
+    Create a Qdrant client from configuration.
+    Uses gRPC against a remote server when QDRANT_URL is set,
+    otherwise opens the embedded store at the local path.
+    """
+    if config.qdrant_url:
+        return QdrantClient(
+            url=config.qdrant_url,
+            prefer_grpc=True,
+            grpc_port=config.qdrant_grpc_port,
+            timeout=config.qdrant_timeout
+        )
+    return QdrantClient(path=config.qdrant_local_path)
+
+
+@functools.lru_cache(maxsize=1)
+def get_qdrant_client() -> QdrantClient:
+    """
+    Shared Qdrant client for the process, created on first use.
+    The embedded local store can only be opened once per process, so the
+    chatbot, builders and scripts all go through this accessor.
+    """
+    return create_qdrant_client()
+
+
+def get_vector_store(collection_name: str, embeddings: Embeddings) -> Qdrant:
+    """
+    LangChain vector store over a collection of the shared client.
+    Not memoized: builders pass the embeddings of their own EmbeddingService,
+    so a cache keyed on them would never hit and would keep every model alive.
+    """
+    return Qdrant(client=get_qdrant_client(), collection_name=collection_name, embeddings=embeddings)
+
+
+def initialize_qdrant_client() -> QdrantClient:
+    """Initialize Qdrant client using configuration."""
+    try:
+        client = get_qdrant_client()
+        print(f"Initialized Qdrant client at: {config.qdrant_url or config.qdrant_local_path}")
+        collections = client.get_collections()
+        print(f"Successfully connected to Qdrant. Existing collections: {[c.name for c in collections.collections]}")
+        return client
+    except Exception as e:
+        raise VectorStoreError(f"Failed to initialize Qdrant client: {e}")
+
+
+QUANTIZATION_MODES = ("scalar", "binary")
+VECTOR_DTYPES = ("float32", "float16")
+
+
+def vector_params(embeddings_size: int, quantization: Optional[str] = None) -> models.VectorParams:
+    """
+    Vector configuration for a memory collection.
+    Embeddings are L2-normalized by the embedding service, so dot product
+    equals cosine similarity without per-vector normalization at search time.
+    With quantization the full-precision vectors live on disk and only the
+    quantized copy is kept in RAM for search. EMBEDDING_DTYPE=float16 halves
+    the size of the stored vectors.
+    """
+    if config.embedding_dtype not in VECTOR_DTYPES:
+        raise ValueError(f"Unknown embedding dtype '{config.embedding_dtype}'. Expected one of {VECTOR_DTYPES}.")
+    return models.VectorParams(
+        size=embeddings_size,
+        distance=models.Distance.DOT,
+        on_disk=bool(quantization) or None,
+        datatype=models.Datatype.FLOAT16 if config.embedding_dtype == "float16" else None
+    )
+
+
+def quantization_config(
+    quantization: Optional[str] = None
+) -> Optional[Union[models.ScalarQuantization, models.BinaryQuantization]]:
+    """
+    Quantization config for a mode: "scalar" (int8), "binary" (1 bit per dimension),
+    or None when quantization is disabled.
+    """
+    if not quantization:
+        return None
+    if quantization == "scalar":
+        return models.ScalarQuantization(
+            scalar=models.ScalarQuantizationConfig(
+                type=models.ScalarType.INT8,
+                quantile=0.99,
+                always_ram=True
+            )
+        )
+    if quantization == "binary":
+        return models.BinaryQuantization(
+            binary=models.BinaryQuantizationConfig(always_ram=True)
+        )
+    raise ValueError(f"Unknown quantization mode '{quantization}'. Expected one of {QUANTIZATION_MODES}.")
+
+
+def hnsw_config() -> models.HnswConfigDiff:
+    """HNSW index parameters for memory collections."""
+    return models.HnswConfigDiff(m=config.hnsw_m, ef_construct=config.hnsw_ef_construct)
+
+
+def search_params() -> models.SearchParams:
+    """
+    Query-time search parameters.
+    For quantized collections, candidates are scanned on the quantized vectors and
+    the oversampled top results are rescored with the originals; the quantization
+    settings are ignored for collections without quantization.
+    """
+    return models.SearchParams(
+        hnsw_ef=config.hnsw_ef,
+        quantization=models.QuantizationSearchParams(
+            rescore=True,
+            oversampling=config.quantization_oversampling
+        )
+    )
+
+
+def create_or_recreate_collection(
+    client: QdrantClient,
+    collection_name: str,
+    embeddings_size: int,
+    *,
+    quantization: Optional[str] = None
+):
+    """
+    Creates a new collection or re-creates it if it already exists,
+    ensuring it's configured for vector storage.
+    quantization selects the quantization mode ("scalar", "binary" or None).
+    """
+    if client.collection_exists(collection_name=collection_name):
+        print(f"Collection '{collection_name}' already exists. Deleting and re-creating...")
+        client.delete_collection(collection_name=collection_name)
+
+    client.create_collection(
+        collection_name=collection_name,
+        vectors_config=vector_params(embeddings_size, quantization),
+        hnsw_config=hnsw_config(),
+        quantization_config=quantization_config(quantization),
+    )
+    print(f"Collection '{collection_name}' created/re-created successfully.")
+
+
+def rows_to_documents(
+    rows: List[Dict[str, Any]],
+    content_key: str,
+    metadata_builder: Callable[[int, Dict[str, Any]], Dict[str, Any]]
+) -> List[Document]:
+    """
+    Convert loaded JSON rows into LangChain Documents.
+    page_content comes from row[content_key]; metadata_builder(index, row) supplies
+    the per-row metadata, to which a shared ingestion timestamp is added.
+    """
+    ingestion_timestamp = datetime.datetime.now(datetime.timezone.utc).isoformat()
+    documents = []
+    for i, row in enumerate(rows):
+        metadata = metadata_builder(i, row)
+        metadata["ingestion_timestamp_utc"] = ingestion_timestamp
+        documents.append(Document(page_content=row[content_key], metadata=metadata))
+    return documents
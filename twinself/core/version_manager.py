@@ -1,17 +1,83 @@
-import json
 import os
 import shutil
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional, Any
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 
+import orjson
 from qdrant_client import QdrantClient, models
 
 from .config import config
+from .file_hash import compute_file_hash
+from .file_io import atomic_write_bytes
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
 
-@dataclass
+# Linux ioctl that clones a file's extents into another (btrfs, xfs, bcachefs)
+_FICLONE = 0x40049409
+
+
+def _reflink_copy(src: str, dst: str) -> str:
+    """
+    Copy a file like shutil.copy2, sharing its data blocks copy-on-write
+    when the filesystem supports reflinks. Falls back to a byte copy otherwise.
+    """
+    if fcntl is not None:
+        try:
+            with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+                fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+            shutil.copystat(src, dst)
+            return dst
+        except OSError:
+            pass
+    return shutil.copy2(src, dst)
+
+
+def _reflink_copytree(src: Path, dst: Path, ignore=None) -> Path:
+    """shutil.copytree using reflink copies, so snapshots cost no data blocks until they diverge."""
+    return shutil.copytree(src, dst, ignore=ignore, copy_function=_reflink_copy)
+
+
+def _dir_size(path: str) -> int:
+    """Total size of the files under path; DirEntry.stat avoids a separate lookup per file."""
+    total = 0
+    with os.scandir(path) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                total += _dir_size(entry.path)
+            elif entry.is_file(follow_symlinks=False):
+                total += entry.stat(follow_symlinks=False).st_size
+    return total
+
+
+def _tree_size(path: str) -> int:
+    """_dir_size with the top-level subdirectories measured in parallel."""
+    total, subdirs = 0, []
+    with os.scandir(path) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(entry.path)
+            elif entry.is_file(follow_symlinks=False):
+                total += entry.stat(follow_symlinks=False).st_size
+    if subdirs:
+        with ThreadPoolExecutor(max_workers=min(8, len(subdirs))) as executor:
+            total += sum(executor.map(_dir_size, subdirs))
+    return total
+
+
+_OBJECTS_DIR = "objects"
+_MANIFEST_FILE = "manifest.json"
+# Qdrant lock and scratch files are never part of a snapshot
+_IGNORED_SUFFIXES = ('.lock', '.tmp', '.temp')
+
+
+@dataclass(slots=True)
 class MemoryVersion:
     """Represents a version of memory collections."""
     version_id: str
@@ -35,21 +101,43 @@ class VersionManager:
         self.registry_path.parent.mkdir(parents=True, exist_ok=True)
         self.snapshots_dir = Path(snapshots_dir)
         self.snapshots_dir.mkdir(parents=True, exist_ok=True)
+        # Content-addressed file store shared by all snapshot manifests
+        self.objects_dir = self.snapshots_dir / _OBJECTS_DIR
         self.versions: List[MemoryVersion] = []
+        self._by_id: Dict[str, MemoryVersion] = {}
+        self._active_id: Optional[str] = None
+        # Snapshot sizes by version_id, dropped when a snapshot is created or deleted
+        self._size_cache: Dict[str, int] = {}
         self._load_registry()
     
     def _load_registry(self):
-        """Load version registry from disk."""
+        """Load version registry from disk and index it by version_id."""
         if self.registry_path.exists():
-            with open(self.registry_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                self.versions = [MemoryVersion(**v) for v in data.get('versions', [])]
+            data = orjson.loads(self.registry_path.read_bytes())
+            self.versions = [MemoryVersion(**v) for v in data.get('versions', [])]
+        self._by_id = {v.version_id: v for v in self.versions}
+        self._active_id = None
+        for v in self.versions:
+            # The latest active version wins if an older registry flagged several
+            if v.is_active:
+                if self._active_id:
+                    self._by_id[self._active_id].is_active = False
+                self._active_id = v.version_id
+    
+    def _activate(self, version: MemoryVersion):
+        """Make version the active one, deactivating only the previously active version."""
+        if self._active_id in self._by_id:
+            self._by_id[self._active_id].is_active = False
+        version.is_active = True
+        self._active_id = version.version_id
     
     def _save_registry(self):
         """Save version registry to disk."""
-        data = {'versions': [asdict(v) for v in self.versions]}
-        with open(self.registry_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        # orjson serializes the dataclasses directly, without asdict copies
+        atomic_write_bytes(
+            self.registry_path,
+            orjson.dumps({'versions': self.versions}, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        )
     
     def create_version(
         self,
@@ -65,51 +153,29 @@ class VersionManager:
             timestamp=datetime.now().isoformat(),
             collections=collections,
             data_hash=data_hash,
-            metadata=metadata or {},
-            is_active=True
+            metadata=metadata or {}
         )
         
-        for v in self.versions:
-            v.is_active = False
-        
         self.versions.append(version)
+        self._by_id[version_id] = version
+        self._activate(version)
         self._save_registry()
         
         print(f"Created version: {version_id}")
         return version_id
     
     def get_active_version(self) -> Optional[MemoryVersion]:
-        for v in reversed(self.versions):
-            if v.is_active:
-                return v
-        return None
+        return self._by_id.get(self._active_id) if self._active_id else None
+    
+    def get_version(self, version_id: str) -> Optional[MemoryVersion]:
+        return self._by_id.get(version_id)
     
     def list_versions(self) -> List[MemoryVersion]:
         return self.versions
     
-    def rollback_to_version(self, version_id: str) -> bool:
-        target_version = None
-        for v in self.versions:
-            if v.version_id == version_id:
-                target_version = v
-                break
-        
-        if not target_version:
-            print(f"Version {version_id} not found")
-            return False
-        
-        for v in self.versions:
-            v.is_active = False
-        
-        target_version.is_active = True
-        self._save_registry()
-        
-        print(f"Rolled back to version: {version_id}")
-        return True
-    
     def get_version_diff(self, version_id1: str, version_id2: str) -> Dict[str, Any]:
-        v1 = next((v for v in self.versions if v.version_id == version_id1), None)
-        v2 = next((v for v in self.versions if v.version_id == version_id2), None)
+        v1 = self._by_id.get(version_id1)
+        v2 = self._by_id.get(version_id2)
         
         if not v1 or not v2:
             return {}
@@ -142,6 +208,87 @@ class VersionManager:
         return diff
 
     
+    def _store_object(self, filepath: str) -> Dict[str, Any]:
+        """
+        Add a file to the object store (if its content is new) and return its manifest entry.
+        The file is copied first and the copy is hashed, so an object's name always
+        matches its bytes even if the source changes meanwhile.
+        """
+        tmp_path = self.objects_dir / f"{uuid.uuid4().hex}.tmp"
+        try:
+            _reflink_copy(filepath, str(tmp_path))
+            digest = compute_file_hash(str(tmp_path), "sha256")
+            stat = os.stat(tmp_path)
+            object_path = self.objects_dir / digest
+            if object_path.exists():
+                tmp_path.unlink()
+            else:
+                os.replace(tmp_path, object_path)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        return {"sha256": digest, "mode": stat.st_mode & 0o777, "size": stat.st_size}
+    
+    def _store_tree(self, root: Path) -> Dict[str, Any]:
+        """
+        Store every file under root in the object store, hashing files in parallel.
+        Returns the manifest: {"dirs": [...], "files": {relpath: {sha256, mode, size}}}.
+        """
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        dirs, paths = [], []
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames.sort()
+            rel_dir = Path(dirpath).relative_to(root)
+            if rel_dir != Path('.'):
+                dirs.append(rel_dir.as_posix())
+            paths.extend(
+                os.path.join(dirpath, name) for name in sorted(filenames)
+                if not name.endswith(_IGNORED_SUFFIXES)
+            )
+        
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+            entries = list(executor.map(self._store_object, paths))
+        files = {Path(path).relative_to(root).as_posix(): entry for path, entry in zip(paths, entries)}
+        return {"dirs": dirs, "files": files}
+    
+    def _restore_tree(self, manifest: Dict[str, Any], root: Path):
+        """
+        Rebuild a directory tree from a manifest.
+        Files are copied (reflinked where supported) rather than hard-linked:
+        Qdrant rewrites its files in place, which would corrupt the shared objects.
+        """
+        root.mkdir(parents=True, exist_ok=True)
+        for rel_dir in manifest.get("dirs", []):
+            (root / rel_dir).mkdir(parents=True, exist_ok=True)
+        
+        def restore_file(item):
+            rel_path, entry = item
+            dest = root / rel_path
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            _reflink_copy(str(self.objects_dir / entry["sha256"]), str(dest))
+            os.chmod(dest, entry["mode"])
+        
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+            list(executor.map(restore_file, manifest["files"].items()))
+    
+    def _collect_garbage(self) -> int:
+        """Delete objects no snapshot manifest references. Returns the number removed."""
+        if not self.objects_dir.exists():
+            return 0
+        referenced = set()
+        for snapshot in self.list_snapshots():
+            manifest_path = self.snapshots_dir / snapshot / _MANIFEST_FILE
+            if manifest_path.exists():
+                files = orjson.loads(manifest_path.read_bytes())["files"]
+                referenced.update(entry["sha256"] for entry in files.values())
+        
+        removed = 0
+        for object_path in self.objects_dir.iterdir():
+            if object_path.name not in referenced:
+                object_path.unlink()
+                removed += 1
+        return removed
+    
     def create_snapshot(self, version_id: str, system_prompt_file: Optional[str] = None) -> bool:
         try:
             snapshot_path = self.snapshots_dir / version_id
@@ -151,14 +298,13 @@ class VersionManager:
                 print(f"Qdrant path does not exist: {qdrant_path}")
                 return False
             
+            self._size_cache.pop(version_id, None)
             if snapshot_path.exists():
                 shutil.rmtree(snapshot_path)
+            snapshot_path.mkdir(parents=True)
             
-            def ignore_lock_files(directory, files):
-                """Ignore lock files and temporary files during copy."""
-                return [f for f in files if f.endswith(('.lock', '.tmp', '.temp'))]
-            
-            shutil.copytree(qdrant_path, snapshot_path, ignore=ignore_lock_files)
+            manifest = self._store_tree(qdrant_path)
+            atomic_write_bytes(snapshot_path / _MANIFEST_FILE, orjson.dumps(manifest, option=orjson.OPT_INDENT_2))
             
             # Copy system prompt if provided
             if system_prompt_file:
@@ -186,19 +332,24 @@ class VersionManager:
 
             backup_path = qdrant_path.parent / f"qdrant_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
             if qdrant_path.exists():
-                shutil.copytree(qdrant_path, backup_path)
+                _reflink_copytree(qdrant_path, backup_path)
                 print(f"Current state backed up to: {backup_path}")
             
             if qdrant_path.exists():
                 shutil.rmtree(qdrant_path)
 
-            shutil.copytree(snapshot_path, qdrant_path, 
-                          ignore=shutil.ignore_patterns('system_prompt.md'))
+            manifest_path = snapshot_path / _MANIFEST_FILE
+            if manifest_path.exists():
+                self._restore_tree(orjson.loads(manifest_path.read_bytes()), qdrant_path)
+            else:
+                # Snapshots taken before the object store are full copies
+                _reflink_copytree(snapshot_path, qdrant_path,
+                                  ignore=shutil.ignore_patterns('system_prompt.md'))
 
             if restore_system_prompt:
                 prompt_source = snapshot_path / "system_prompt.md"
                 if prompt_source.exists():
-                    version = next((v for v in self.versions if v.version_id == version_id), None)
+                    version = self._by_id.get(version_id)
                     if version and version.system_prompt_file:
                         prompt_dest = Path(version.system_prompt_file)
                         prompt_dest.parent.mkdir(parents=True, exist_ok=True)
@@ -220,12 +371,7 @@ class VersionManager:
             version_id: Version to rollback to
             restore_data: If True, restores actual Qdrant data from snapshot
         """
-        target_version = None
-        for v in self.versions:
-            if v.version_id == version_id:
-                target_version = v
-                break
-        
+        target_version = self._by_id.get(version_id)
         if not target_version:
             print(f"Version {version_id} not found")
             return False
@@ -235,12 +381,8 @@ class VersionManager:
             if not self.restore_snapshot(version_id):
                 print(f"Failed to restore data, but updating active version pointer")
         
-        # Deactivate all versions
-        for v in self.versions:
-            v.is_active = False
-        
-        # Activate target version
-        target_version.is_active = True
+        # Swap the active flag from the current version to the target
+        self._activate(target_version)
         self._save_registry()
         
         print(f"Rolled back to version: {version_id}")
@@ -250,14 +392,16 @@ class VersionManager:
         """List all available snapshots."""
         if not self.snapshots_dir.exists():
             return []
-        return [d.name for d in self.snapshots_dir.iterdir() if d.is_dir()]
+        return [d.name for d in self.snapshots_dir.iterdir() if d.is_dir() and d.name != _OBJECTS_DIR]
     
     def delete_snapshot(self, version_id: str) -> bool:
         """Delete a snapshot to free up space."""
         try:
             snapshot_path = self.snapshots_dir / version_id
+            self._size_cache.pop(version_id, None)
             if snapshot_path.exists():
                 shutil.rmtree(snapshot_path)
+                self._collect_garbage()
                 print(f"Deleted snapshot: {version_id}")
                 return True
             else:
@@ -269,16 +413,25 @@ class VersionManager:
     
     def get_snapshot_size(self, version_id: str) -> int:
         """Get size of a snapshot in bytes."""
+        if version_id in self._size_cache:
+            return self._size_cache[version_id]
+        
         snapshot_path = self.snapshots_dir / version_id
         if not snapshot_path.exists():
             return 0
         
-        total_size = 0
-        for dirpath, dirnames, filenames in os.walk(snapshot_path):
-            for filename in filenames:
-                filepath = os.path.join(dirpath, filename)
-                total_size += os.path.getsize(filepath)
-        return total_size
+        manifest_path = snapshot_path / _MANIFEST_FILE
+        if manifest_path.exists():
+            # Logical size of the stored tree; objects shared with other snapshots count in each
+            files = orjson.loads(manifest_path.read_bytes())["files"]
+            prompt_path = snapshot_path / "system_prompt.md"
+            prompt_size = prompt_path.stat().st_size if prompt_path.exists() else 0
+            size = sum(entry["size"] for entry in files.values()) + prompt_size
+        else:
+            size = _tree_size(str(snapshot_path))
+        
+        self._size_cache[version_id] = size
+        return size
     
     def cleanup_old_snapshots(self, keep_last: int = 5) -> int:
         """
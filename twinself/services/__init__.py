@@ -4,7 +4,12 @@ Contains embedding and other services.
 """
 
 from .embedding_service import EmbeddingService
+from .embedding_cache import EmbeddingCache, CachedEmbeddings
+from .response_cache import ResponseCache
 
 __all__ = [
-    "EmbeddingService"
+    "EmbeddingService",
+    "EmbeddingCache",
+    "CachedEmbeddings",
+    "ResponseCache"
 ]
@@ -0,0 +1,100 @@
+"""
+Persistent embedding cache keyed by text content hash.
+Lets repeated builds skip the model forward pass for unchanged documents.
+"""
+import os
+import re
+import sqlite3
+import hashlib
+from array import array
+from typing import Dict, Iterable, List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+from ..core.config import config
+
+# Stay well below SQLite's bound-parameter limit for IN (...) lookups
+_LOOKUP_CHUNK_SIZE = 500
+
+
+class EmbeddingCache:
+    """SQLite-backed store mapping text hashes to embedding vectors for one model."""
+
+    def __init__(self, model_name: str, cache_dir: Optional[str] = None):
+        """
+        Open (or create) the cache file for a model.
+
+        Args:
+            model_name: Embedding model the vectors belong to; each model gets its own file.
+            cache_dir: Directory holding cache files. If None, uses config default.
+        """
+        cache_dir = cache_dir or config.cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+        self.path = os.path.join(cache_dir, f"embeddings_{safe_name}.sqlite")
+
+        self._conn = sqlite3.connect(self.path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (hash TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def text_hash(text: str) -> str:
+        """Content hash used as the cache key."""
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, List[float]]:
+        """Return cached vectors for the given keys; missing keys are omitted."""
+        keys = list(keys)
+        found = {}
+        for start in range(0, len(keys), _LOOKUP_CHUNK_SIZE):
+            chunk = keys[start:start + _LOOKUP_CHUNK_SIZE]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self._conn.execute(
+                f"SELECT hash, vector FROM embeddings WHERE hash IN ({placeholders})", chunk
+            )
+            for key, blob in rows:
+                found[key] = array("f", blob).tolist()
+        return found
+
+    def put_many(self, vectors: Dict[str, List[float]]):
+        """Store vectors (as float32) under their keys."""
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO embeddings (hash, vector) VALUES (?, ?)",
+            [(key, array("f", vector).tobytes()) for key, vector in vectors.items()]
+        )
+        self._conn.commit()
+
+    def close(self):
+        self._conn.close()
+
+
+class CachedEmbeddings(Embeddings):
+    """LangChain embeddings wrapper that only embeds documents missing from the cache."""
+
+    def __init__(self, embeddings: Embeddings, cache: EmbeddingCache):
+        self._embeddings = embeddings
+        self.cache = cache
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [self.cache.text_hash(text) for text in texts]
+        vectors = self.cache.get_many(set(keys))
+
+        # Embed each distinct uncached text once
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors and key not in missing:
+                missing[key] = text
+
+        if missing:
+            new_vectors = self._embeddings.embed_documents(list(missing.values()))
+            computed = dict(zip(missing.keys(), new_vectors))
+            self.cache.put_many(computed)
+            vectors.update(computed)
+
+        return [vectors[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embeddings.embed_query(text)
@@ -1,9 +1,75 @@
+from functools import cached_property
 from typing import List, Optional
 
+import numpy as np
+from langchain_core.embeddings import Embeddings
 from langchain_huggingface import HuggingFaceEmbeddings
 
 from ..core.config import config
 from ..core.exceptions import EmbeddingError
+from .embedding_cache import EmbeddingCache, CachedEmbeddings
+
+
+def _sentence_transformer(embeddings: HuggingFaceEmbeddings):
+    """SentenceTransformer behind a HuggingFaceEmbeddings (private _client in newer releases)."""
+    return getattr(embeddings, "_client", None) or getattr(embeddings, "client", None)
+
+
+def pack_by_token_budget(lengths: List[int], token_budget: int) -> List[List[int]]:
+    """
+    Group text indices into batches whose padded size (batch length times its
+    longest text) stays within token_budget. Texts are taken longest first, so
+    each batch holds texts of similar length and little padding is computed.
+    A text longer than the budget gets a batch of its own.
+    """
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i], reverse=True)
+    batches = []
+    batch, longest = [], 0
+    for i in order:
+        if batch and (len(batch) + 1) * longest > token_budget:
+            batches.append(batch)
+            batch = []
+        if not batch:
+            longest = max(lengths[i], 1)
+        batch.append(i)
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+class TokenBudgetEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that sizes each model forward pass by a token budget
+    instead of a fixed number of texts: short texts share large batches and
+    long ones small batches. Vectors are returned in input order.
+    """
+
+    def __init__(self, embeddings: HuggingFaceEmbeddings, token_budget: int):
+        self._embeddings = embeddings
+        self.token_budget = token_budget
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        model = _sentence_transformer(self._embeddings)
+        tokenizer = getattr(model, "tokenizer", None)
+        if not texts or tokenizer is None:
+            return self._embeddings.embed_documents(texts)
+
+        # Same preprocessing as HuggingFaceEmbeddings, so cached vectors stay comparable
+        texts = [text.replace("\n", " ") for text in texts]
+        max_length = getattr(model, "max_seq_length", None) or float("inf")
+        lengths = [min(len(ids), max_length) for ids in tokenizer(texts)["input_ids"]]
+
+        encode_kwargs = dict(self._embeddings.encode_kwargs)
+        encode_kwargs.pop("batch_size", None)
+        vectors = [None] * len(texts)
+        for batch in pack_by_token_budget(lengths, self.token_budget):
+            encoded = model.encode([texts[i] for i in batch], batch_size=len(batch), **encode_kwargs)
+            for i, vector in zip(batch, np.asarray(encoded).tolist()):
+                vectors[i] = vector
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embeddings.embed_query(text)
 
 
 class EmbeddingService:
@@ -19,12 +85,35 @@ class EmbeddingService:
         """
         self._model_name = model_name or config.embedding_model_name
         self._cache_folder = cache_folder or config.model_cache_folder
-        
-        self._embeddings = HuggingFaceEmbeddings(
-            model_name=self._model_name,
-            model_kwargs={"trust_remote_code": True},
-            cache_folder=self._cache_folder
-        )
+        self._cached_embeddings: Optional[CachedEmbeddings] = None
+
+        self._embeddings = self._load_embeddings(config.embedding_backend)
+        self._batched = TokenBudgetEmbeddings(self._embeddings, config.batch_token_budget)
+
+    def _load_embeddings(self, backend: str) -> HuggingFaceEmbeddings:
+        """
+        Load the sentence-transformers model with the given inference backend.
+        The "onnx" backend runs the model through ONNX Runtime (exporting it on first
+        use) and falls back to PyTorch when the ONNX extras are missing or the
+        model cannot be exported.
+        """
+        model_kwargs = {"trust_remote_code": True}
+        if backend != "torch":
+            model_kwargs["backend"] = backend
+
+        try:
+            return HuggingFaceEmbeddings(
+                model_name=self._model_name,
+                model_kwargs=model_kwargs,
+                # Unit-length vectors let the collections use dot-product distance
+                encode_kwargs={"batch_size": config.embedding_batch_size, "normalize_embeddings": True},
+                cache_folder=self._cache_folder
+            )
+        except Exception as e:
+            if backend == "torch":
+                raise
+            print(f"Warning: Could not load embeddings with '{backend}' backend ({e}). Falling back to torch.")
+            return self._load_embeddings("torch")
     
     def embed_query(self, text: str) -> List[float]:
         """Embed a single query text."""
@@ -46,18 +135,40 @@ class EmbeddingService:
             raise EmbeddingError("No valid texts to embed")
             
         try:
-            return self._embeddings.embed_documents(valid_texts)
+            return self._batched.embed_documents(valid_texts)
         except Exception as e:
             raise EmbeddingError(f"Failed to embed documents: {e}") from e
     
+    @cached_property
+    def embedding_size(self) -> int:
+        """Size of the embeddings, read from the model instead of embedding a probe when possible."""
+        get_dimension = getattr(_sentence_transformer(self._embeddings), "get_sentence_embedding_dimension", None)
+        size = get_dimension() if callable(get_dimension) else None
+        return size or len(self.embed_query("sample text"))
+    
     def get_embedding_size(self) -> int:
         """Get the size of embeddings."""
         try:
-            dummy_embedding = self.embed_query("sample text")
-            return len(dummy_embedding)
+            return self.embedding_size
         except EmbeddingError:
             return 768  # Default size for most models
     
+    def cached_embeddings(self) -> CachedEmbeddings:
+        """
+        LangChain embeddings that reuse vectors of previously embedded texts.
+        Used by the memory builders so unchanged documents skip the model on rebuild.
+        """
+        if self._cached_embeddings is None:
+            # Vectors cached before normalization was enabled live under the bare model name
+            cache = EmbeddingCache(f"{self._model_name}-normalized")
+            self._cached_embeddings = CachedEmbeddings(self._batched, cache)
+        return self._cached_embeddings
+    
+    @property
+    def tokenizer(self):
+        """Tokenizer of the underlying sentence-transformers model, if available."""
+        return getattr(_sentence_transformer(self._embeddings), "tokenizer", None)
+    
     @property
     def model_name(self) -> str:
         """Get the current model name."""
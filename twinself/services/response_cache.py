@@ -0,0 +1,90 @@
+"""
+Semantic response cache for the chatbot.
+Reuses a previous reply when a new query embedding is close enough to a cached one.
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+
+
+@dataclass
+class _CacheEntry:
+    embedding: np.ndarray
+    response: str
+    fingerprint: str
+    created_at: float
+
+
+class ResponseCache:
+    """
+    In-memory cache of chatbot responses keyed by L2-normalized query embeddings.
+
+    Lookups compare the query against every live entry with the same conversation
+    fingerprint using inner product (cosine similarity on unit vectors).
+    Entries expire after ttl_seconds and the least recently used entry is evicted
+    once max_entries is reached. Methods are thread-safe: the chatbot looks up
+    from worker threads while finished turns are added on the event loop.
+    """
+
+    def __init__(self, threshold: float = 0.85, max_entries: int = 256, ttl_seconds: float = 3600):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[int, _CacheEntry]" = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _evict_expired(self, now: float):
+        expired = [key for key, entry in self._entries.items() if now - entry.created_at > self.ttl_seconds]
+        for key in expired:
+            del self._entries[key]
+
+    def lookup(self, embedding: List[float], fingerprint: str) -> Optional[str]:
+        """Return the cached response most similar to embedding, if above threshold."""
+        query = self._normalize(embedding)
+        with self._lock:
+            self._evict_expired(time.monotonic())
+            candidates = [(key, entry) for key, entry in self._entries.items() if entry.fingerprint == fingerprint]
+            if not candidates:
+                return None
+
+            scores = np.stack([entry.embedding for _, entry in candidates]) @ query
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                return None
+
+            key, entry = candidates[best]
+            self._entries.move_to_end(key)
+            return entry.response
+
+    def add(self, embedding: List[float], fingerprint: str, response: str):
+        """Cache a response for the given query embedding and conversation fingerprint."""
+        entry = _CacheEntry(
+            embedding=self._normalize(embedding),
+            response=response,
+            fingerprint=fingerprint,
+            created_at=time.monotonic()
+        )
+        with self._lock:
+            self._entries[self._next_id] = entry
+            self._next_id += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
@@ -7,9 +7,11 @@ from .generate_rules_from_episodic_data import (
     generate_procedural_rules,
     save_generated_rules
 )
+from .json_stream import iter_json_list
 
 __all__ = [
     "load_episodic_examples",
     "generate_procedural_rules", 
-    "save_generated_rules"
+    "save_generated_rules",
+    "iter_json_list"
 ]
\ No newline at end of file
@@ -5,6 +5,8 @@ Refactored to use centralized configuration.
 
 import os
 import json
+import functools
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict
 
 from langchain_google_genai import ChatGoogleGenerativeAI
@@ -13,38 +15,97 @@ from langchain_core.output_parsers import JsonOutputParser
 
 from ..core.config import config
 from ..core.exceptions import DataLoadingError
+from .json_stream import iter_json_list
+
+# Keys every loaded item must provide, checked with a single set comparison
+EPISODIC_REQUIRED_KEYS = frozenset({"user_query", "your_response"})
+
+# Output structure shown to the LLM
+_OUTPUT_FORMAT = """
+{
+"rules": [
+    {"rule_name": "general_persona", "rule_content": "..."},
+    {"rule_name": "tone_guidelines", "rule_content": "..."},
+    {"rule_name": "interaction_strategy", "rule_content": "..."},
+    {"rule_name": "fallback_behavior", "rule_content": "..."}
+]
+}
+"""
+# Braces doubled once so the template does not read them as variables
+_OUTPUT_FORMAT_ESCAPED = _OUTPUT_FORMAT.replace('{', '{{').replace('}', '}}')
+
+_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        (
+            "system",
+            "You are an AI assistant specialized in analyzing conversation patterns and extracting "
+            "procedural rules for a digital persona. Your goal is to infer the persona, tone, "
+            "and interaction style based on the given conversation examples. "
+            "Formulate these inferences as clear, actionable rules for an AI chatbot. "
+            "Output the rules in JSON format as specified below. Be concise but comprehensive.",
+        ),
+        (
+            "human",
+            "Here are examples of conversation responses:\n\n"
+            "{examples}\n\n"
+            "Based on these examples, infer and define procedural rules for the AI chatbot persona, "
+            "tone, and interaction strategy. Focus on general guidelines, not specific answers. "
+            "Also, suggest rules for handling questions outside its knowledge base (fallback behavior). "
+            "Output in the following JSON format, providing at least 4 distinct rules:\n"
+            f"```json\n{_OUTPUT_FORMAT_ESCAPED}\n```",
+        ),
+    ]
+)
+
+
+@functools.lru_cache(maxsize=4)
+def _get_chain(model_name: str):
+    """Prompt | LLM | JSON parser chain for a model, built once and reused across calls."""
+    return _PROMPT | ChatGoogleGenerativeAI(model=model_name, temperature=0.7) | JsonOutputParser()
 
 # --- Helper Functions ---
 
 
-def load_episodic_examples(directory: str) -> List[Dict[str, str]]:
-    """Load episodic examples from JSON files in the specified directory."""
+def _parse_episodic_file(filepath: str) -> List[Dict[str, str]]:
+    """Return the valid examples of one episodic JSON file."""
+    filename = os.path.basename(filepath)
     examples = []
+    try:
+        # Large files are stream-parsed item by item
+        for item in iter_json_list(filepath):
+            if isinstance(item, dict) and EPISODIC_REQUIRED_KEYS <= item.keys():
+                examples.append(item)
+            else:
+                print(
+                    f"Warning: Skipping malformed item in {filename}."
+                )
+    except json.JSONDecodeError as e:
+        raise DataLoadingError(f"Error decoding JSON from {filename}: {e}")
+    except ValueError:
+        print(
+            f"Warning: Skipping {filename}. Expected JSON list format."
+        )
+    except Exception as e:
+        raise DataLoadingError(f"Error loading {filename}: {e}")
+    return examples
+
+
+def load_episodic_examples(directory: str) -> List[Dict[str, str]]:
+    """
+    Load episodic examples from JSON files in the specified directory.
+    Files are read and parsed on a thread pool; examples keep the listing order.
+    """
     if not os.path.exists(directory):
         raise DataLoadingError(f"Episodic data directory '{directory}' does not exist.")
 
-    for filename in os.listdir(directory):
-        filepath = os.path.join(directory, filename)
-        if os.path.isfile(filepath) and filename.endswith(".json"):
-            try:
-                with open(filepath, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    if isinstance(data, list):
-                        for item in data:
-                            if "user_query" in item and "your_response" in item:
-                                examples.append(item)
-                            else:
-                                print(
-                                    f"Warning: Skipping malformed item in {filename}."
-                                )
-                    else:
-                        print(
-                            f"Warning: Skipping {filename}. Expected JSON list format."
-                        )
-            except json.JSONDecodeError as e:
-                raise DataLoadingError(f"Error decoding JSON from {filename}: {e}")
-            except Exception as e:
-                raise DataLoadingError(f"Error loading {filename}: {e}")
+    with os.scandir(directory) as it:
+        paths = [entry.path for entry in it if entry.name.endswith(".json") and entry.is_file()]
+
+    examples = []
+    if paths:
+        with ThreadPoolExecutor(max_workers=min(32, len(paths))) as executor:
+            for items in executor.map(_parse_episodic_file, paths):
+                examples.extend(items)
 
     if not examples:
         raise DataLoadingError("No valid episodic examples found.")
@@ -78,68 +139,7 @@ def generate_procedural_rules(
         ]
     )
 
-    # Define the output format for the LLM
-    # This is the literal JSON string that the LLM should see, defining its output structure.
-    output_format_json_literal = json.dumps(
-        {
-            "rules": [
-                {
-                    "rule_name": "general_persona",
-                    "rule_content": "Description of overall persona, e.g., friendly, expert, enthusiastic.",
-                },
-                {
-                    "rule_name": "tone_guidelines",
-                    "rule_content": "Specific instructions on tone, e.g., use emojis, be concise.",
-                },
-                {
-                    "rule_name": "interaction_strategy",
-                    "rule_content": "General interaction patterns, e.g., always ask follow-up questions.",
-                },
-                {
-                    "rule_name": "fallback_behavior",
-                    "rule_content": "How to handle unknown questions, e.g., suggest contacting real person.",
-                },
-            ]
-        },
-        indent=2,
-    )
-    output_format = """
-{
-"rules": [
-    {"rule_name": "general_persona", "rule_content": "..."},
-    {"rule_name": "tone_guidelines", "rule_content": "..."},
-    {"rule_name": "interaction_strategy", "rule_content": "..."},
-    {"rule_name": "fallback_behavior", "rule_content": "..."}
-]
-}
-"""
-
-    prompt_template = ChatPromptTemplate.from_messages(
-        [
-            (
-                "system",
-                "You are an AI assistant specialized in analyzing conversation patterns and extracting "
-                "procedural rules for a digital persona. Your goal is to infer the persona, tone, "
-                "and interaction style based on the given conversation examples. "
-                "Formulate these inferences as clear, actionable rules for an AI chatbot. "
-                "Output the rules in JSON format as specified below. Be concise but comprehensive.",
-            ),
-            (
-                "human",
-                "Here are examples of conversation responses:\n\n"
-                "{examples}\n\n"
-                "Based on these examples, infer and define procedural rules for the AI chatbot persona, "
-                "tone, and interaction strategy. Focus on general guidelines, not specific answers. "
-                "Also, suggest rules for handling questions outside its knowledge base (fallback behavior). "
-                "Output in the following JSON format, providing at least 4 distinct rules:\n"
-                f"```json\n{output_format.replace('{','{{').replace('}','}}')}\n```",
-            ),
-        ]
-    )
-
-    llm = ChatGoogleGenerativeAI(model=model_name, temperature=0.7)
-    parser = JsonOutputParser()
-    chain = prompt_template | llm | parser
+    chain = _get_chain(model_name)
 
     try:
         raw_rules = chain.invoke({"examples": formatted_examples})
@@ -0,0 +1,51 @@
+"""
+Streaming helpers for JSON list files.
+Large files are parsed item-by-item with ijson when it is installed.
+"""
+import os
+import json
+from typing import Any, Iterator
+
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    IJSON_AVAILABLE = False
+
+# Files at or above this size are streamed instead of loaded in one go
+STREAMING_THRESHOLD_BYTES = 8 * 1024 * 1024
+
+
+def _starts_with_list(f) -> bool:
+    """Check whether a binary JSON stream starts with a top-level array."""
+    while True:
+        char = f.read(1)
+        if not char:
+            return False
+        if not char.isspace():
+            f.seek(0)
+            return char == b"["
+
+
+def iter_json_list(filepath: str) -> Iterator[Any]:
+    """
+    Yield the items of the top-level JSON list stored in filepath.
+
+    Small files (or all files when ijson is missing) go through json.load;
+    larger ones are streamed so memory stays flat regardless of file size.
+
+    Raises:
+        ValueError: If the file does not contain a JSON list.
+    """
+    if IJSON_AVAILABLE and os.path.getsize(filepath) >= STREAMING_THRESHOLD_BYTES:
+        with open(filepath, "rb") as f:
+            if not _starts_with_list(f):
+                raise ValueError(f"{os.path.basename(filepath)} does not contain a JSON list")
+            yield from ijson.items(f, "item", use_float=True)
+        return
+
+    with open(filepath, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, list):
+        raise ValueError(f"{os.path.basename(filepath)} does not contain a JSON list")
+    yield from data
@@ -2,11 +2,70 @@
 System Prompt Loader Utility
 Load system prompts from versioned data
 """
+import asyncio
+import logging
+import mmap
+import os
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import cached_property
 from pathlib import Path
-from typing import Optional
+from typing import Any, Optional, Tuple
 from ..core.config import config
 from ..core.version_manager import VersionManager
 
+logger = logging.getLogger(__name__)
+
+# Prompt used when the active version has none; interned like all cache keys
+DEFAULT_PROMPT = sys.intern("default_prompt.md")
+
+# Marks the active prompt as not yet resolved (None is a valid key: no active version)
+_UNRESOLVED = object()
+
+# Prompts at least this large are decoded straight from a read-only mapping
+_MMAP_THRESHOLD_BYTES = 1 << 20
+
+
+@dataclass(frozen=True)
+class PromptEntry:
+    """A cached prompt with its length, computed once when the file is read."""
+    text: str
+    length: int
+    mtime_ns: int
+    
+    @cached_property
+    def text_bytes(self) -> bytes:
+        """UTF-8 encoding of the prompt, encoded on first use and kept with the entry."""
+        return self.text.encode('utf-8')
+
+
+def _read_prompt_file(path: Path) -> PromptEntry:
+    """
+    Read a prompt as UTF-8. Small files take one read() and a single decode;
+    large ones are decoded from an mmap of the page cache, skipping the
+    intermediate bytes copy.
+    """
+    with open(path, 'rb') as f:
+        stat = os.fstat(f.fileno())
+        if stat.st_size < _MMAP_THRESHOLD_BYTES:
+            text = f.read().decode('utf-8')
+        else:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                text = str(mapped, 'utf-8')
+    return PromptEntry(text=text, length=len(text), mtime_ns=stat.st_mtime_ns)
+
+
+def _preload_prompt_file(path: Path) -> Optional[PromptEntry]:
+    """Read a prompt for preloading; unreadable files are logged and skipped."""
+    try:
+        return _read_prompt_file(path)
+    except (OSError, UnicodeDecodeError) as e:
+        logger.warning("Skipping prompt %s during preload: %s", path.name, e)
+        return None
+
 
 class PromptLoader:
     """Load and manage system prompts from versioning system."""
@@ -14,23 +73,91 @@ class PromptLoader:
     def __init__(self):
         self.version_manager = VersionManager()
         self.prompts_dir = Path(config.system_prompts_dir)
-        self._cache = {}
+        # LRU of filename -> entry, bounded by config.prompt_cache_size
+        self._cache: "OrderedDict[str, PromptEntry]" = OrderedDict()
+        self._cache_size = config.prompt_cache_size
+        # Guards every read and update of the LRU; files are read outside it
+        self._lock = threading.Lock()
+        # Stat cached prompts on lookup and re-read those changed on disk
+        self._check_mtime = config.prompts_live_reload
+        # Active prompt resolved for (version_id, system_prompt_file) of the active version
+        self._active_key: Any = _UNRESOLVED
+        self._active_path: Optional[Path] = None
+        self._active_entry: Optional[PromptEntry] = None
+        self.preload()
+        try:
+            self._refresh_active()
+        except FileNotFoundError:
+            pass  # No default prompt yet; get_active_prompt raises when called
+    
+    def preload(self):
+        """
+        Read every prompt file in the prompts directory into the cache.
+        Files are read on a small thread pool so their disk latency overlaps.
+        """
+        names = self.list_available_prompts()
+        if not names:
+            return
+        paths = [self.prompts_dir / name for name in names]
+        with ThreadPoolExecutor(max_workers=min(8, len(paths))) as executor:
+            for name, entry in zip(names, executor.map(_preload_prompt_file, paths)):
+                if entry is not None:
+                    self._cache_put(name, entry)
+    
+    async def preload_async(self):
+        """preload for async startup code: files are read in worker threads while the event loop runs."""
+        names = self.list_available_prompts()
+        entries = await asyncio.gather(
+            *(asyncio.to_thread(_preload_prompt_file, self.prompts_dir / name) for name in names)
+        )
+        for name, entry in zip(names, entries):
+            if entry is not None:
+                self._cache_put(name, entry)
+    
+    def _cache_put(self, filename: str, entry: PromptEntry):
+        """Cache a prompt as most recently used, evicting the least recently used beyond the bound."""
+        filename = sys.intern(filename)
+        with self._lock:
+            self._cache[filename] = entry
+            self._cache.move_to_end(filename)
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+    
+    def _cache_get(self, filename: str) -> Optional[PromptEntry]:
+        """Cached entry of a prompt, marked as most recently used."""
+        with self._lock:
+            entry = self._cache.get(filename)
+            if entry is not None:
+                self._cache.move_to_end(filename)
+            return entry
+    
+    def _current_active_key(self) -> Optional[Tuple[str, Optional[str]]]:
+        active_version = self.version_manager.get_active_version()
+        return (active_version.version_id, active_version.system_prompt_file) if active_version else None
+    
+    def _refresh_active(self):
+        """
+        Resolve the file backing the active prompt: the active version's prompt
+        if it exists, otherwise default_prompt.md. Its content is cached with it.
+        """
+        active_version = self.version_manager.get_active_version()
+        path = None
+        if active_version and active_version.system_prompt_file:
+            path = Path(active_version.system_prompt_file)
+            if not path.is_file():
+                path = None
+        self._active_path = path or self.prompts_dir / DEFAULT_PROMPT
+        self._active_entry = self._load_entry(self._active_path)
+        self._active_key = self._current_active_key()
     
     def get_active_prompt(self) -> str:
         """
         Get the system prompt from active version.
         Falls back to default_prompt.md if not found.
         """
-        # Try to get from active version
-        active_version = self.version_manager.get_active_version()
-        
-        if active_version and active_version.system_prompt_file:
-            prompt_path = Path(active_version.system_prompt_file)
-            if prompt_path.exists():
-                return self._load_prompt(prompt_path)
-        
-        # Fallback to default
-        return self.get_prompt("default_prompt.md")
+        if self._check_mtime or self._active_key != self._current_active_key():
+            self._refresh_active()
+        return self._active_entry.text
     
     def get_prompt(self, filename: str) -> str:
         """
@@ -42,34 +169,54 @@ class PromptLoader:
         Returns:
             Content of the prompt file
         """
-        # Check cache
-        if filename in self._cache:
-            return self._cache[filename]
-        
-        prompt_path = self.prompts_dir / filename
-        
-        if not prompt_path.exists():
-            raise FileNotFoundError(f"System prompt not found: {filename}")
+        return self.get_prompt_entry(filename).text
+    
+    def get_prompt_bytes(self, filename: str) -> bytes:
+        """UTF-8 encoded prompt, for consumers that take bytes; encoded once per cached entry."""
+        return self.get_prompt_entry(filename).text_bytes
+    
+    def get_prompt_entry(self, filename: str) -> PromptEntry:
+        """Cached entry of a prompt, reading the file on a cache miss."""
+        entry = self._cache_get(filename)
+        if entry is not None and self._check_mtime:
+            try:
+                if os.stat(self.prompts_dir / filename).st_mtime_ns != entry.mtime_ns:
+                    entry = None
+            except FileNotFoundError:
+                with self._lock:
+                    self._cache.pop(filename, None)
+                raise FileNotFoundError(f"System prompt not found: {filename}") from None
+        if entry is not None:
+            return entry
         
-        content = self._load_prompt(prompt_path)
-        self._cache[filename] = content
-        return content
+        # Evicted, added after startup or changed on disk
+        try:
+            entry = _read_prompt_file(self.prompts_dir / filename)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"System prompt not found: {filename}") from None
+        self._cache_put(filename, entry)
+        return entry
     
-    def _load_prompt(self, path: Path) -> str:
-        """Load prompt content from file."""
-        with open(path, 'r', encoding='utf-8') as f:
-            return f.read()
+    def _load_entry(self, path: Path) -> PromptEntry:
+        """Load a prompt by path, through the cache for files in the prompts directory."""
+        if path.parent == self.prompts_dir:
+            return self.get_prompt_entry(path.name)
+        return _read_prompt_file(path)
     
     def list_available_prompts(self) -> list[str]:
         """List all available prompt files."""
-        if not self.prompts_dir.exists():
+        try:
+            with os.scandir(self.prompts_dir) as it:
+                return [e.name for e in it if e.name.endswith('.md') and e.is_file()]
+        except FileNotFoundError:
             return []
-        
-        return [f.name for f in self.prompts_dir.glob('*.md')]
     
     def clear_cache(self):
-        """Clear the prompt cache."""
-        self._cache.clear()
+        """Clear the prompt cache and read the prompts directory again."""
+        with self._lock:
+            self._cache.clear()
+        self._active_key = _UNRESOLVED
+        self.preload()
     
     def reload_prompt(self, filename: str) -> str:
         """
@@ -81,20 +228,34 @@ class PromptLoader:
         Returns:
             Fresh content of the prompt file
         """
-        if filename in self._cache:
-            del self._cache[filename]
-        return self.get_prompt(filename)
+        with self._lock:
+            self._cache.pop(filename, None)
+        self._active_key = _UNRESOLVED
+        prompt_path = self.prompts_dir / filename
+        if not prompt_path.exists():
+            raise FileNotFoundError(f"System prompt not found: {filename}")
+        
+        entry = _read_prompt_file(prompt_path)
+        self._cache_put(filename, entry)
+        return entry.text
 
 
 # Global instance
-_prompt_loader = None
+_prompt_loader: Optional[PromptLoader] = None
+_prompt_loader_lock = threading.Lock()
 
 
 def get_prompt_loader() -> PromptLoader:
-    """Get or create global PromptLoader instance."""
+    """
+    Get or create global PromptLoader instance.
+    The lock makes concurrent first calls build a single loader; afterwards
+    the instance is returned without locking.
+    """
     global _prompt_loader
     if _prompt_loader is None:
-        _prompt_loader = PromptLoader()
+        with _prompt_loader_lock:
+            if _prompt_loader is None:
+                _prompt_loader = PromptLoader()
     return _prompt_loader
 
 